@@ -7,6 +7,9 @@
 # Description:
 #   Contains common classes used in the project.
 #====================================================================
+import os
+
+
 class Singleton(object):
     """
     Singleton implementation.\n
@@ -35,6 +38,11 @@ class ApplicationManager(Singleton):
     scene = None
     sceneLoading = False
 
+    # Path to record the input of every game to, and a recorded game to replay
+    recordPath = None
+    replayLog = None
+    gamesRecorded = 0
+
     def __init__(self):
         pass
 
@@ -46,4 +54,15 @@ class ApplicationManager(Singleton):
         self.sceneLoading = False
 
     def get_scene(self):
-        return self.scene
\ No newline at end of file
+        return self.scene
+
+    def next_record_path(self):
+        """
+        Returns the path to record the next game to. The first game uses
+        recordPath, the next ones are numbered (ex. game-2.rec).
+        """
+        self.gamesRecorded += 1
+        if self.gamesRecorded == 1:
+            return self.recordPath
+        (base, ext) = os.path.splitext(self.recordPath)
+        return "%s-%d%s" % (base, self.gamesRecorded, ext)
\ No newline at end of file
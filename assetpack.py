@@ -0,0 +1,119 @@
+#====================================================================
+# Name: assetpack.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Packs every sprite into one file of pre-decoded pixels, and reads
+#   them back through a memory map without decoding or copying.
+#
+#   Build the pack from the project directory with:
+#       python assetpack.py
+#
+#   File layout (little-endian):
+#       header  - magic, number of entries
+#       index   - one entry per image (name, size, pitch, format,
+#                 colorkey, offset and length of the pixels)
+#       pixels  - the pixels of every image, 64 byte aligned
+#====================================================================
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+MAGIC = b"SIPACK01"
+HEADER = struct.Struct("<8sI")
+ENTRY = struct.Struct("<64sHHI4sB3BQQ")
+ALIGN = 64
+
+# Byte order of the pixels. "BGRA" matches the usual 32-bit display
+# format (red mask 0xff0000), so blits need no conversion.
+PIXEL_FORMAT = "BGRA"
+
+
+class AssetPack():
+    """
+    A memory-mapped pack of pre-decoded images.\n
+    The file is mapped copy-on-write, so the pages are shared between every
+    game running on the machine and surfaces point straight into the map.\n
+    @attr path [str] - The pack file\n
+    @attr index [dict] - name -> (width, height, pitch, format, colorkey, offset, length)
+    """
+    def __init__(self, path):
+        self.path = path
+        self.mtime = os.path.getmtime(path)
+        self.index = {}
+
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.view = memoryview(self.map)
+
+        (magic, count) = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC:
+            raise ValueError('"%s" is not an asset pack' % path)
+
+        pos = HEADER.size
+        for i in range(count):
+            (name, width, height, pitch, fmt, keyed, r, g, b, offset, length) = ENTRY.unpack_from(self.map, pos)
+            colorkey = (r, g, b) if keyed else None
+            self.index[name.rstrip(b"\0").decode()] = (width, height, pitch, fmt.decode(), colorkey, offset, length)
+            pos += ENTRY.size
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def load(self, name):
+        "Returns a surface that uses the pixels of the pack without copying them."
+        (width, height, pitch, fmt, colorkey, offset, length) = self.index[name]
+        # The rows are packed without padding (pitch == width * 4). Passing the
+        # pitch to frombuffer() is avoided, some pygame versions then do not
+        # keep a reference to the buffer.
+        surface = pygame.image.frombuffer(self.view[offset:offset + length], (width, height), fmt)
+        # The images are opaque, drop the alpha channel so blits are plain copies
+        surface.set_alpha(None)
+        if colorkey is not None:
+            surface.set_colorkey(colorkey)
+        return surface
+
+
+def build(directory, path):
+    """
+    Decode every image in the directory and write them to a pack file.\n
+    @param directory [str] - The directory containing the images\n
+    @param path [str] - The pack file to write
+    """
+    images = []
+    for name in sorted(os.listdir(directory)):
+        if os.path.splitext(name)[1].lower() not in (".gif", ".png", ".bmp", ".jpg"):
+            continue
+        surface = pygame.image.load(os.path.join(directory, name))
+        images.append((name, surface, pygame.image.tobytes(surface, PIXEL_FORMAT)))
+
+    offset = HEADER.size + ENTRY.size * len(images)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(images)))
+
+        pixels = []
+        for (name, surface, data) in images:
+            offset += -offset % ALIGN
+            colorkey = surface.get_colorkey()
+            (r, g, b) = colorkey[:3] if colorkey is not None else (0, 0, 0)
+            f.write(ENTRY.pack(name.encode(), surface.get_width(), surface.get_height(),
+                               surface.get_width() * 4, PIXEL_FORMAT.encode(),
+                               colorkey is not None, r, g, b, offset, len(data)))
+            pixels.append((offset, data))
+            offset += len(data)
+
+        for (offset, data) in pixels:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+
+    print("Packed %d images into %s (%d bytes)" % (len(images), path, os.path.getsize(path)))
+
+
+if __name__ == "__main__":
+    from utils import main_dir
+    from const import ASSET_PACK
+    path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(main_dir, ASSET_PACK)
+    build(os.path.join(main_dir, "sprites"), path)
@@ -0,0 +1,120 @@
+#====================================================================
+# Name: audio.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   The AudioManager sets up the mixer for low latency, keeps the sound
+#   effects decoded, and plays them on a pool of reserved channels.
+#====================================================================
+import time
+
+import pygame
+
+import const
+from app import Singleton
+from utils import load_sound
+
+class AudioManager(Singleton):
+    """
+    Plays sound effects on a pool of reserved channels.\n
+    When every channel is busy, a voice is stolen instead of the new sound
+    being lost: first the oldest voice of the same sound once it has
+    MAX_VOICES of them, then the oldest voice of the same or a lower priority.\n
+    @attr sounds [dict] - The decoded sounds, kept for the whole program\n
+    @attr voices [list] - (sound, start time, priority) of each effect channel, or None\n
+    @attr played [int] - Number of sounds played\n
+    @attr stolen [int] - Number of voices cut short to play a new sound\n
+    @attr dropped [int] - Number of sounds not played, every voice had a higher priority
+    """
+    def init(self):
+        self.sounds = {}
+        self.channels = []
+        self.voices = []
+        self.played = 0
+        self.stolen = 0
+        self.dropped = 0
+
+    def pre_init(self):
+        "Set the mixer settings, before the mixer is started (when the first sound loads)."
+        pygame.mixer.pre_init(const.AUDIO_FREQUENCY, -16, 2, const.AUDIO_BUFFER)
+
+    def load(self, file):
+        "Returns the decoded sound, loading it the first time."
+        sound = self.sounds.get(file)
+        if sound is None:
+            sound = load_sound(file)
+            if sound is None:
+                return None
+            self.sounds[file] = sound
+        if not self.channels:
+            self.__reserve_channels()
+        return sound
+
+    def play(self, sound, priority=0):
+        """
+        Play a sound effect on the channel pool.\n
+        @param sound [pygame.mixer.Sound] - A sound returned by load()\n
+        @param priority [int] - Voices of a higher priority are not stolen
+        """
+        if sound is None or not self.channels:
+            return
+
+        index = self.__pick_channel(sound, priority)
+        if index is None:
+            self.dropped += 1
+            return
+
+        if self.voices[index] is not None and self.channels[index].get_busy():
+            self.stolen += 1
+        self.channels[index].play(sound)
+        self.voices[index] = (sound, time.perf_counter(), priority)
+        self.played += 1
+
+    def buffer_latency(self):
+        """
+        Returns the delay in seconds added by the mixer buffer, the latency
+        of a sound between play() and the output on top of the device's own.
+        """
+        if not pygame.mixer.get_init():
+            return 0.0
+        return const.AUDIO_BUFFER / pygame.mixer.get_init()[0]
+
+    def stats(self):
+        "Returns the audio counters as a dict."
+        return {
+            "played": self.played,
+            "stolen": self.stolen,
+            "dropped": self.dropped,
+            "buffer_ms": self.buffer_latency() * 1000,
+        }
+
+    def __reserve_channels(self):
+        if not pygame.mixer.get_init():
+            return
+        pygame.mixer.set_num_channels(max(const.MIXER_CHANNELS, const.SFX_CHANNELS))
+        # Sound.play() and music never pick the reserved channels
+        pygame.mixer.set_reserved(const.SFX_CHANNELS)
+        self.channels = [pygame.mixer.Channel(i) for i in range(const.SFX_CHANNELS)]
+        self.voices = [None] * const.SFX_CHANNELS
+
+    def __pick_channel(self, sound, priority):
+        "Returns the index of the channel to play on, or None to drop the sound."
+        same = []
+        free = None
+        for (i, voice) in enumerate(self.voices):
+            if voice is None or not self.channels[i].get_busy():
+                if free is None:
+                    free = i
+            elif voice[0] is sound:
+                same.append(i)
+
+        # Too many copies of the sound at once only clip, restart the oldest
+        if len(same) >= const.MAX_VOICES:
+            return min(same, key=lambda i: self.voices[i][1])
+        if free is not None:
+            return free
+
+        candidates = [i for (i, voice) in enumerate(self.voices) if voice[2] <= priority]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda i: self.voices[i][1])
@@ -0,0 +1,200 @@
+#====================================================================
+# Name: batch.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Plays many seeded headless games with a bot over a grid of balance
+#   settings, spread over a process pool that uses every core. Every
+#   finished game is appended to a CSV file (survival time, score and
+#   waves cleared), and the throughput of each worker is written as JSON.
+#
+#   python batch.py --param MAX_SHOT=3,5,8 --param MAX_E_SPEED=4,5,6 \
+#                   --seeds 1000 --bot tracker --output results.csv
+#====================================================================
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+import time
+
+COLUMNS = ("seed", "bot", "ticks", "survival_s", "score", "waves", "lives", "worker")
+
+
+def sweep_bot(simulation, rng):
+    "Sweep the player left and right while tapping fire."
+    direction = 1 if (simulation.ticks // 90) % 2 == 0 else -1
+    return (direction, simulation.ticks % 2 == 0)
+
+
+class RandomBot():
+    "Hold a random direction for a while and fire at random."
+    def __init__(self):
+        self.direction = 0
+
+    def __call__(self, simulation, rng):
+        if simulation.ticks % 15 == 0:
+            self.direction = rng.choice((-1, 0, 1))
+        return (self.direction, rng.random() < 0.5)
+
+
+class TrackerBot():
+    "Move under the lowest enemy and fire as fast as possible."
+    def __init__(self):
+        from gameobjects import Enemy
+        self.halfWidth = Enemy.image.get_width() // 2
+
+    def __call__(self, simulation, rng):
+        positions = simulation.entities.positions()
+        direction = 0
+        if len(positions):
+            (x, y) = max(positions, key=lambda pos: pos[1])
+            centerx = simulation.player.rect.centerx
+            target = x + self.halfWidth
+            if target < centerx - 4:
+                direction = -1
+            elif target > centerx + 4:
+                direction = 1
+        # The player only fires again after releasing the trigger
+        return (direction, simulation.ticks % 2 == 0)
+
+
+# A bot is a function of (simulation, rng) returning the (direction, firing)
+# input of the tick. Bots that keep state between ticks are classes, and
+# every game gets its own instance
+BOTS = {
+    "sweep": sweep_bot,
+    "random": RandomBot,
+    "tracker": TrackerBot,
+}
+
+
+def play(job):
+    """
+    Play a single game until the player dies or maxTicks (runs in a worker process).\n
+    @param job [tuple] - (settings, seed, bot, maxTicks, backend)\n
+    Returns the settings, the result row and the seconds it took.
+    """
+    from const import TICK_RATE
+    from simulation import Simulation
+
+    (settings, seed, bot, maxTicks, backend) = job
+    start = time.perf_counter()
+
+    simulation = Simulation(backend=backend, seed=seed, settings=settings)
+    simulation.initialize()
+    controller = BOTS[bot]
+    if isinstance(controller, type):
+        controller = controller()
+    rng = random.Random(seed)
+
+    while simulation.ticks < maxTicks and not simulation.is_over():
+        simulation.set_input(*controller(simulation, rng))
+        simulation.step()
+    simulation.close()
+
+    row = {
+        "seed": seed,
+        "bot": bot,
+        "ticks": simulation.ticks,
+        "survival_s": round(simulation.ticks / TICK_RATE, 3),
+        "score": simulation.score,
+        "waves": simulation.wavesCleared,
+        "lives": max(simulation.player.lives, 0),
+        "worker": os.getpid(),
+    }
+    return (settings, row, time.perf_counter() - start)
+
+
+def parse_param(text):
+    "Parse NAME=v1,v2,... into (NAME, [values])."
+    from simulation import SETTINGS
+
+    (name, sep, values) = text.partition("=")
+    name = name.strip().upper()
+    if not sep or name not in SETTINGS:
+        raise argparse.ArgumentTypeError("expected NAME=v1,v2,... with NAME one of %s" % ", ".join(SETTINGS))
+    try:
+        return (name, [int(value) for value in values.split(",") if value.strip()])
+    except ValueError:
+        raise argparse.ArgumentTypeError("the values of %s must be integers" % name)
+
+
+def jobs(grid, seeds, firstSeed, bot, maxTicks, backend):
+    "Yields a job for every seed of every combination of the grid."
+    names = [name for (name, values) in grid]
+    for combination in itertools.product(*[values for (name, values) in grid]):
+        settings = dict(zip(names, combination))
+        for seed in range(firstSeed, firstSeed + seeds):
+            yield (settings, seed, bot, maxTicks, backend)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play seeded headless games over a grid of balance settings.")
+    parser.add_argument("--param", action="append", type=parse_param, default=[], metavar="NAME=V1,V2",
+                        help="values of a setting to sweep, can be repeated")
+    parser.add_argument("--seeds", type=int, default=100, help="games per combination of the grid")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--bot", choices=sorted(BOTS), default="tracker", help="the player")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 10, help="end a game after this many ticks")
+    parser.add_argument("--backend", choices=("sprite", "numpy"), help="entity storage of the simulation")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: every core)")
+    parser.add_argument("--chunksize", type=int, default=16, help="games sent to a worker at once")
+    parser.add_argument("--output", default="results.csv", help="CSV file the games are written to")
+    parser.add_argument("--stats", help="JSON file of the throughput of each worker")
+    args = parser.parse_args()
+
+    grid = args.param
+    names = [name for (name, values) in grid]
+    total = args.seeds
+    for (name, values) in grid:
+        total *= len(values)
+
+    workers = {}
+    start = time.perf_counter()
+    done = 0
+    with open(args.output, "w", newline="") as f, multiprocessing.Pool(args.workers) as pool:
+        writer = csv.writer(f)
+        writer.writerow(tuple(names) + COLUMNS)
+
+        games = jobs(grid, args.seeds, args.first_seed, args.bot, args.max_ticks, args.backend)
+        for (settings, row, seconds) in pool.imap_unordered(play, games, args.chunksize):
+            writer.writerow([settings[name] for name in names] + [row[column] for column in COLUMNS])
+
+            worker = workers.setdefault(row["worker"], {"games": 0, "ticks": 0, "seconds": 0.0})
+            worker["games"] += 1
+            worker["ticks"] += row["ticks"]
+            worker["seconds"] += seconds
+
+            done += 1
+            if done % 1000 == 0:
+                f.flush()
+                print("%d/%d games" % (done, total), file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    for worker in workers.values():
+        worker["games_per_second"] = worker["games"] / worker["seconds"] if worker["seconds"] else 0.0
+        worker["ticks_per_second"] = worker["ticks"] / worker["seconds"] if worker["seconds"] else 0.0
+    stats = {
+        "games": done,
+        "seconds": elapsed,
+        "games_per_second": done / elapsed if elapsed else 0.0,
+        "ticks": sum(worker["ticks"] for worker in workers.values()),
+        "workers": dict((str(pid), worker) for (pid, worker) in sorted(workers.items())),
+    }
+    print("%d games in %.1f s (%.1f games/s) on %d workers" % (done, elapsed, stats["games_per_second"], len(workers)),
+          file=sys.stderr)
+    if args.stats:
+        with open(args.stats, "w") as f:
+            json.dump(stats, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,9 @@
+#====================================================================
+# Name: bench/__init__.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Benchmarks for the game. Run them from the project directory:
+#       python -m bench.game        - game loop scenarios (JSON results)
+#       python -m bench.collision   - collision broadphase
+#====================================================================
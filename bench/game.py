@@ -0,0 +1,248 @@
+#====================================================================
+# Name: bench/game.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Headless benchmark suite for the game loop. Every scenario runs in
+#   its own process with the dummy video and audio drivers and scripted
+#   input, and reports per-phase frame time percentiles, sprites drawn
+#   per second and peak memory as JSON.
+#
+#   python -m bench.game [--frames 600] [--output results.json]
+#   python -m bench.game --baseline results.json
+#====================================================================
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+PHASES = ("input", "update", "render", "present")
+
+
+def percentile(samples, pct):
+    "Returns the pct percentile of the samples (nearest rank)."
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def scripted_input(frame):
+    "Sweep the player left and right while tapping fire."
+    direction = 1 if (frame // 90) % 2 == 0 else -1
+    return (direction, frame % 2 == 0)
+
+
+def init_display():
+    import pygame
+    from const import SCREENRECT
+    pygame.display.init()
+    pygame.font.init()
+    return pygame.display.set_mode(SCREENRECT.size)
+
+
+def game_scene(waveSize=None, swarm=0, backend=None):
+    "Returns a factory for an initialized GameScene."
+    def create():
+        from scenes import GameScene
+        from simulation import Simulation
+
+        simulation = Simulation(backend=backend)
+        simulation.waveSize = waveSize
+        scene = GameScene(simulation)
+        scene.initialize()
+
+        # Keep the player alive so every frame does the same kind of work
+        scene.player.lives = 10**9
+        if swarm:
+            positions = [((i % 24) * 33, (i // 24) % 14 * 20) for i in range(swarm)]
+            simulation.entities.spawn_wave(positions, 2, 1)
+            simulation.entities.sync()
+        return scene
+    return create
+
+
+def title_scene():
+    from scenes import TitleScene
+    scene = TitleScene()
+    scene.initialize()
+    return scene
+
+
+# name -> (scene factory, const overrides)
+SCENARIOS = {
+    "default_wave": (game_scene(), {}),
+    "max_grid": (game_scene(waveSize=(4, 10)), {}),
+    "max_shot": (game_scene(waveSize=(4, 10)), {"MAX_SHOT": 50}),
+    "swarm_5000": (game_scene(swarm=5000), {}),
+    "swarm_5000_numpy": (game_scene(swarm=5000, backend="numpy"), {}),
+    "title_idle": (title_scene, {}),
+}
+
+
+def run_scenario(name, frames, seed):
+    "Run one scenario and return its results (runs in a worker process)."
+    # Keep stdout for the JSON results
+    sys.stdout = sys.stderr
+
+    import pygame
+    import const
+    from counters import work
+
+    (factory, overrides) = SCENARIOS[name]
+    for (key, value) in overrides.items():
+        setattr(const, key, value)
+
+    random.seed(seed)
+    screen = init_display()
+    scene = factory()
+    simulation = getattr(scene, "simulation", None)
+
+    timings = dict((phase, []) for phase in PHASES)
+    frameTimes = []
+    sprites = 0
+    clock = time.perf_counter
+
+    start = clock()
+    for frame in range(frames):
+        t0 = clock()
+        pygame.event.pump()
+        if simulation is not None:
+            (scene.direction, scene.firing) = scripted_input(frame)
+        else:
+            pygame.event.get()
+            scene.sample_input()
+        t1 = clock()
+        scene.update()
+        t2 = clock()
+        scene.render(screen)
+        t3 = clock()
+        scene.present()
+        t4 = clock()
+
+        timings["input"].append(t1 - t0)
+        timings["update"].append(t2 - t1)
+        timings["render"].append(t3 - t2)
+        timings["present"].append(t4 - t3)
+        frameTimes.append(t4 - t0)
+        work.end_frame()
+        if simulation is not None:
+            sprites += len(scene.all)
+    elapsed = clock() - start
+
+    result = {
+        "frames": frames,
+        "seconds": elapsed,
+        "fps": frames / elapsed,
+        "sprites_per_second": sprites / elapsed,
+        "frame_ms": summarize(frameTimes),
+        "phases_ms": dict((phase, summarize(samples)) for (phase, samples) in timings.items()),
+        "peak_rss_kb": None,
+        "pools": simulation.pool_stats() if simulation is not None else {},
+        "work_per_frame": work.stats(),
+    }
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result["peak_rss_kb"] = peak // 1024 if sys.platform == "darwin" else peak
+    return result
+
+
+def summarize(samples):
+    return {
+        "p50": percentile(samples, 50) * 1000,
+        "p95": percentile(samples, 95) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+        "max": max(samples) * 1000,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of every scenario against a baseline.\n
+    Returns the names of the scenarios slower than threshold (ex. 0.1 = 10%).
+    """
+    regressions = []
+    print(f"{'scenario':<20} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>8}", file=sys.stderr)
+    for (name, result) in results["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            print(f"{name:<20} (not in baseline)", file=sys.stderr)
+            continue
+        for metric in ("p50", "p95", "p99"):
+            old = base["frame_ms"][metric]
+            new = result["frame_ms"][metric]
+            change = (new - old) / old if old else 0.0
+            flag = " !" if change > threshold else ""
+            print(f"{name:<20} {metric:<8} {old:>10.3f} {new:>10.3f} {change:>+7.1%}{flag}", file=sys.stderr)
+            if change > threshold and name not in regressions:
+                regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the game loop.")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all of %s)" % ", ".join(SCENARIOS))
+    parser.add_argument("--frames", type=int, default=600, help="frames per scenario")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    parser.add_argument("--output", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="compare against saved JSON results")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="slowdown reported as a regression (default 0.10 = 10%%)")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    for name in names:
+        if name not in SCENARIOS:
+            parser.error("unknown scenario '%s'" % name)
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "frames": args.frames,
+        "seed": args.seed,
+        "scenarios": {},
+    }
+
+    # A fresh process per scenario, so the peak memory and the caches
+    # of one scenario do not leak into the next
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results["scenarios"][name] = pool.submit(run_scenario, name, args.frames, args.seed).result()
+        frame = results["scenarios"][name]["frame_ms"]
+        print(f"{name:<20} p50 {frame['p50']:7.3f} ms  p95 {frame['p95']:7.3f} ms  p99 {frame['p99']:7.3f} ms",
+              file=sys.stderr)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
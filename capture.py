@@ -0,0 +1,228 @@
+#====================================================================
+# Name: capture.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Records the presented frames without stalling the game loop. The
+#   main thread only copies each frame into a free buffer of a ring,
+#   and a writer thread encodes the buffers to a PNG sequence or to a
+#   raw RGB24 video stream. When the writer falls behind, the frames
+#   that find no free buffer are dropped and counted.
+#
+#   The output has a fixed rate of CAPTURE_FPS frames per second of play:
+#   a frame that stays on screen longer (ex. a menu waiting for input, or
+#   a dropped frame) is written several times, and a frame replaced within
+#   the same output frame is skipped. A raw stream plays in real time with:
+#   ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i game.rgb game.mp4
+#====================================================================
+import math
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import const
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+RAW_EXTENSIONS = (".rgb", ".raw")
+
+
+def png_chunk(kind, data):
+    "Returns a PNG chunk: length, type, data and CRC."
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def encode_png(rows, level=const.CAPTURE_PNG_LEVEL):
+    """
+    Encode an image as a PNG file.\n
+    zlib releases the GIL while it compresses, so the game keeps running
+    while a frame is encoded on another thread.\n
+    @param rows [numpy.ndarray] - (height, 1 + width * 3) uint8, a 0 (no filter) then the RGB pixels of each row
+    """
+    (height, width) = (rows.shape[0], (rows.shape[1] - 1) // 3)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + png_chunk(b"IHDR", header) +
+            png_chunk(b"IDAT", zlib.compress(rows, level)) + png_chunk(b"IEND", b""))
+
+
+class FrameCapture():
+    """
+    Copies the presented frames into a ring of preallocated buffers that a
+    writer thread saves, and drops the frames that find the ring full.\n
+    A path ending in .rgb or .raw is written as one raw RGB24 stream, any
+    other path is a directory of numbered PNG files.\n
+    A captured frame is held until the next one arrives, then queued with
+    the number of output frames it stayed on screen for.\n
+    @attr path [str] - The raw file or the PNG directory\n
+    @attr raw [bool] - True to write a raw stream instead of PNG files\n
+    @attr fps [int] - The frame rate of the output\n
+    @attr captured [int] - Number of frames copied into the ring\n
+    @attr skipped [int] - Number of frames replaced before their output frame was due\n
+    @attr dropped [int] - Number of frames skipped because no buffer was free\n
+    @attr written [int] - Number of output frames saved by the writer, repeats included
+    """
+    def __init__(self, path, slots=const.CAPTURE_SLOTS, fps=const.CAPTURE_FPS):
+        if numpy is None:
+            raise ImportError("Capturing frames requires the numpy package")
+
+        self.path = path
+        self.raw = os.path.splitext(path)[1].lower() in RAW_EXTENSIONS
+        self.slots = slots
+        self.fps = fps
+        self.startTime = None
+        self.held = None        # (buffer index, first output frame) of the last capture
+        self.buffers = []
+        self.free = queue.Queue()
+        self.full = queue.Queue()
+        self.captured = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.written = 0
+        self.error = None
+        self.thread = None
+
+    def start(self, screen):
+        """
+        Allocate the ring for frames of the screen and start the writer.\n
+        @param screen [pygame.Surface] - The display surface
+        """
+        (width, height) = screen.get_size()
+        self.size = (width, height)
+        self.pitch = screen.get_pitch()
+        self.bytesize = screen.get_bytesize()
+        # Byte of each colour in a pixel, the shifts count from the low byte
+        shifts = screen.get_shifts()[:3]
+        if sys.byteorder == "little":
+            self.channels = [shift // 8 for shift in shifts]
+        else:
+            self.channels = [self.bytesize - 1 - shift // 8 for shift in shifts]
+
+        self.buffers = [numpy.empty((height, self.pitch), numpy.uint8) for i in range(self.slots)]
+        # The writer converts every frame into the same RGB array, PNG
+        # rows start with a filter byte
+        if self.raw:
+            self.output = numpy.empty((height, width * 3), numpy.uint8)
+            self.rgb = self.output.reshape(height, width, 3)
+        else:
+            self.output = numpy.zeros((height, 1 + width * 3), numpy.uint8)
+            self.rgb = self.output[:, 1:].reshape(height, width, 3)
+        for index in range(self.slots):
+            self.free.put(index)
+
+        if self.raw:
+            directory = os.path.dirname(self.path)
+        else:
+            directory = self.path
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.thread = threading.Thread(target=self.__write, name="FrameCapture", daemon=True)
+        self.thread.start()
+
+    def capture(self, screen):
+        "Copy the frame on the screen into a free buffer, or drop it."
+        now = time.perf_counter()
+        if self.startTime is None:
+            self.startTime = now
+        # The first output frame shown at or after now
+        number = self.__output_frame(now)
+
+        if self.held is not None and number <= self.held[1]:
+            # The held frame was never due, the new frame takes its place
+            (index, number) = self.held
+            self.skipped += 1
+        else:
+            try:
+                index = self.free.get_nowait()
+            except queue.Empty:
+                # The held frame stays on screen until a buffer is free
+                self.dropped += 1
+                return
+            self.__release(number)
+
+        # A single copy of the locked pixels, the writer does the rest
+        pixels = numpy.frombuffer(screen.get_buffer(), numpy.uint8)
+        self.buffers[index].reshape(-1)[:] = pixels[:self.buffers[index].size]
+        del pixels
+        self.held = (index, number)
+        self.captured += 1
+
+    def __output_frame(self, now):
+        "Returns the number of the first output frame at or after the time now."
+        return math.ceil((now - self.startTime) * self.fps)
+
+    def __release(self, end):
+        "Queue the held frame for the writer, repeated up to output frame end."
+        if self.held is not None:
+            (index, number) = self.held
+            self.full.put((index, number, max(end - number, 1)))
+            self.held = None
+
+    def stop(self):
+        "Save the frames left in the ring and end the writer."
+        if self.thread is not None:
+            if self.held is not None:
+                self.__release(self.__output_frame(time.perf_counter()))
+            self.full.put(None)
+            self.thread.join()
+            self.thread = None
+        if self.error is not None:
+            print("Frame capture failed: %s" % self.error)
+
+    def stats(self):
+        "Returns the capture counters as a dict."
+        return {
+            "captured": self.captured,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+            "written": self.written,
+            "pending": self.full.qsize(),
+        }
+
+    def convert(self, index):
+        "Copy the frame in the buffer to the RGB array of the writer."
+        (width, height) = self.size
+        pixels = self.buffers[index][:, :width * self.bytesize].reshape(height, width, self.bytesize)
+        # A strided copy per colour is much cheaper than a fancy index
+        for (i, channel) in enumerate(self.channels):
+            self.rgb[:, :, i] = pixels[:, :, channel]
+
+    def __write(self):
+        stream = open(self.path, "wb") if self.raw else None
+        try:
+            while True:
+                item = self.full.get()
+                if item is None:
+                    break
+                (index, number, repeat) = item
+                try:
+                    if self.error is None:
+                        self.convert(index)
+                        self.__save(stream, number, repeat)
+                except OSError as e:
+                    # Keep emptying the ring so the game is not stopped by a full disk
+                    self.error = e
+                finally:
+                    self.free.put(index)
+        finally:
+            if stream is not None:
+                stream.close()
+
+    def __save(self, stream, number, repeat):
+        if stream is None:
+            data = encode_png(self.output)
+        for i in range(repeat):
+            if stream is not None:
+                stream.write(self.output)
+            else:
+                with open(os.path.join(self.path, "frame%06d.png" % (number + i)), "wb") as f:
+                    f.write(data)
+            self.written += 1
@@ -0,0 +1,165 @@
+#====================================================================
+# Name: collision.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Uniform grid (spatial hash) broadphase for sprite collisions.
+#   The SpatialGroup is a pygame sprite group that also buckets its
+#   sprites by grid cell, and the spritecollide/groupcollide functions
+#   mirror the pygame ones while only testing nearby sprites. The
+#   collide_mask narrowphase then tests the pixels of the pairs left.
+#====================================================================
+import pygame
+
+from const import COLLISION_CELL_SIZE, COLLISION_GRID_MIN_QUERIES
+from counters import work
+
+
+class SpatialGroup(pygame.sprite.Group):
+    """
+    A sprite group indexed by a uniform grid over the screen.\n
+    Sprites are bucketed when added and removed when killed. Call moved()
+    once the sprites have moved, and index() before testing them: the first
+    index() that uses the grid re-buckets the sprites that crossed a cell
+    border. Refreshing walks every sprite, so with few queries index()
+    leaves the grid off and candidates() returns every sprite.\n
+    @attr cellSize [int] - The width and height of a grid cell in pixels\n
+    @attr minQueries [int] - Fewest sprites tested against the group for the grid to be used\n
+    @attr indexed [bool] - True if candidates() uses the grid\n
+    @attr fresh [bool] - True if the grid matches the sprite positions
+    """
+    def __init__(self, *sprites, cellSize=COLLISION_CELL_SIZE, minQueries=COLLISION_GRID_MIN_QUERIES):
+        self.cellSize = cellSize
+        self.minQueries = minQueries
+        self.indexed = False
+        self.fresh = False
+        self.cells = {}         # (column, row) -> {sprite: None}
+        self.spriteCells = {}   # sprite -> (left, top, right, bottom) cell bounds
+        pygame.sprite.Group.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.Group.add_internal(self, sprite, layer)
+        # Sprites joining their containers have no rect yet, they are
+        # bucketed on the next refresh()
+        rect = getattr(sprite, "rect", None)
+        bounds = None if rect is None else self.__bounds(rect)
+        self.spriteCells[sprite] = bounds
+        self.__link(sprite, bounds)
+
+    def remove_internal(self, sprite):
+        pygame.sprite.Group.remove_internal(self, sprite)
+        self.__unlink(sprite, self.spriteCells.pop(sprite))
+
+    def moved(self):
+        "Note that the sprites moved, the next index() using the grid refreshes it."
+        self.fresh = False
+
+    def refresh(self):
+        "Re-bucket every sprite that moved into different cells."
+        self.fresh = True
+        spriteCells = self.spriteCells
+        size = self.cellSize
+        for (sprite, old) in spriteCells.items():
+            rect = sprite.rect
+            bounds = (rect.left // size, rect.top // size,
+                      (rect.right - 1) // size, (rect.bottom - 1) // size)
+            if bounds != old:
+                self.__unlink(sprite, old)
+                self.__link(sprite, bounds)
+                spriteCells[sprite] = bounds
+
+    def index(self, queries):
+        """
+        Prepare the group to be tested against queries sprites. The grid is
+        used, and refreshed if the sprites moved, only for enough queries.
+        A single query never uses it.\n
+        Returns True if the grid is used.
+        """
+        self.indexed = queries > 1 and queries >= self.minQueries
+        if self.indexed and not self.fresh:
+            self.refresh()
+        return self.indexed
+
+    def candidates(self, rect):
+        "Returns the sprites sharing a grid cell with the rect, or every sprite if the grid is off."
+        if not self.indexed:
+            # Iterated once by spritecollide() before any sprite is killed
+            return self.spritedict
+        (left, top, right, bottom) = self.__bounds(rect)
+        if left == right and top == bottom:
+            return list(self.cells.get((left, top), ()))
+
+        found = {}
+        cells = self.cells
+        for col in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                cell = cells.get((col, row))
+                if cell:
+                    found.update(cell)
+        return list(found)
+
+    def __bounds(self, rect):
+        size = self.cellSize
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def __link(self, sprite, bounds):
+        if bounds is None:
+            return
+        (left, top, right, bottom) = bounds
+        for col in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                self.cells.setdefault((col, row), {})[sprite] = None
+
+    def __unlink(self, sprite, bounds):
+        if bounds is None:
+            return
+        (left, top, right, bottom) = bounds
+        for col in range(left, right + 1):
+            for row in range(top, bottom + 1):
+                cell = self.cells[(col, row)]
+                del cell[sprite]
+                if not cell:
+                    del self.cells[(col, row)]
+
+
+def collide_mask(left, right):
+    """
+    Narrowphase for spritecollide(): True if the masks of the two sprites
+    overlap. The masks are built once per image and shared by the class
+    (ex. Enemy.mask), they are not created per call like
+    pygame.sprite.collide_mask() does for sprites without one.
+    """
+    offset = (right.rect.x - left.rect.x, right.rect.y - left.rect.y)
+    return left.mask.overlap(right.mask, offset) is not None
+
+
+def spritecollide(sprite, group, dokill, collided=None):
+    """
+    Same as pygame.sprite.spritecollide(), but only tests the sprites of the
+    SpatialGroup that share a grid cell with the sprite.
+    """
+    rect = sprite.rect
+    crashed = [s for s in group.candidates(rect) if rect.colliderect(s.rect)]
+    work.collisionPairs += len(crashed)
+    if collided is not None:
+        crashed = [s for s in crashed if collided(sprite, s)]
+
+    if dokill:
+        for s in crashed:
+            s.kill()
+    return crashed
+
+
+def groupcollide(groupa, groupb, dokilla, dokillb, collided=None):
+    """
+    Same as pygame.sprite.groupcollide(), where groupb is a SpatialGroup.
+    """
+    crashed = {}
+    for sprite in groupa.sprites():
+        collision = spritecollide(sprite, groupb, dokillb, collided)
+        if collision:
+            crashed[sprite] = collision
+            if dokilla:
+                sprite.kill()
+    return crashed
@@ -7,21 +7,113 @@
 # Description:
 #   File containing constants used within project.
 #====================================================================
-import pygame
-
 # Dimensions of window width and height
 WIDTH = 800
 HEIGHT = 600
-FPS = 60
+FPS = 60    # Most frames drawn per second, 0 for no limit
+
+# Display mode. The game always draws to a WIDTH x HEIGHT surface, SCALED
+# lets SDL stretch it to the window on the GPU. VSYNC needs SCALED
+SCALED_DISPLAY = True
+FULLSCREEN = False
+VSYNC = False
+DOUBLE_BUFFER = False
+
+# Simulation steps per second. Speeds are in pixels per step, so the game
+# runs at the same speed whatever the frame rate is
+TICK_RATE = 60
+
+# Most simulation steps run in one frame to catch up after a slow frame,
+# the time past that is dropped instead of slowing every later frame
+MAX_CATCH_UP = 5
+
+# Longest wait in milliseconds for an event while a static scene or the
+# pause screen is shown
+IDLE_TIMEOUT = 500
+
+# Sprites that moved further than this in one step (ex. a new wave) are
+# drawn at their new position instead of interpolated
+SNAP_DISTANCE = 64
+
+# Mixer settings. A small buffer lowers the delay between a shot and its sound
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 512          # Samples per mix, 512 / 44100 = 11.6 ms
+MIXER_CHANNELS = 16
+SFX_CHANNELS = 8            # Channels reserved for the sound effects
+MAX_VOICES = 4              # Most copies of one sound playing at once
 
 # Max shots that can appear on screen
 MAX_SHOT = 1
 
-SCREENRECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+
+def __getattr__(name):
+    # SCREENRECT is built on first use, so importing the constants
+    # does not import pygame
+    if name == "SCREENRECT":
+        global SCREENRECT
+        import pygame
+        SCREENRECT = pygame.Rect(0, 0, WIDTH, HEIGHT)
+        return SCREENRECT
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Fraction of the screen the dirty rects may cover before
+# falling back to a full screen update
+DIRTY_RECT_THRESHOLD = 0.5
 
 # Enemy variables
 MIN_E_SPEED = 1
 MAX_E_SPEED = 5
 MAX_SPEED_FACTOR = 4
 MIN_E_COL = 6
-MAX_E_COL = 10
\ No newline at end of file
+MAX_E_COL = 10
+MAX_E_ROW = 4
+ENEMY_SPEED_LIMIT = 12
+ENEMY_SPEED_STEP = 1
+
+# Width and height of a cell of the collision grid
+COLLISION_CELL_SIZE = 64
+
+# Fewest sprites tested against a group before its collision grid is
+# used. Refreshing the grid walks every sprite of the group, so it only
+# pays off for many queries (measured with bench/collision.py)
+COLLISION_GRID_MIN_QUERIES = 20
+
+# Test the drawn pixels of the sprites whose rects overlap, so hits on
+# the transparent corners of a sprite do not count. Off by default, it
+# changes the outcome of recorded games
+PIXEL_COLLISIONS = False
+
+# Byte budget of the decoded image and sound cache
+ASSET_CACHE_BYTES = 32 * 1024 * 1024
+
+# Byte budget of the rendered text cache
+TEXT_CACHE_BYTES = 4 * 1024 * 1024
+
+# Pack of pre-decoded sprites built by assetpack.py
+ASSET_PACK = "sprites.pack"
+
+# Number of frames kept by the frame timer
+FRAME_HISTORY = 600
+
+# Frames recorded by a cProfile capture (F6, or the SI_PROFILE_FRAMES
+# environment variable to capture from startup)
+PROFILE_FRAMES = 300
+
+# Stack frames kept per allocation by --trace-alloc, and the number of
+# lines printed for every scene change
+TRACEMALLOC_FRAMES = 8
+TRACEMALLOC_TOP = 10
+
+# Buffers of the frame capture ring, frames are dropped while all of them
+# wait for the writer. PNG compression level, 1 is the fastest
+CAPTURE_SLOTS = 8
+CAPTURE_PNG_LEVEL = 1
+
+# Frame rate of the captured video, frames are repeated or skipped to match
+CAPTURE_FPS = 60
+
+# Storage for enemies and lasers in the simulation ("sprite" or "numpy")
+ENTITY_BACKEND = "sprite"
+# Maximum number of killed lasers and enemies kept for reuse (per class)
+SPRITE_POOL_LIMIT = 4096
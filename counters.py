@@ -0,0 +1,76 @@
+#====================================================================
+# Name: counters.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Counts the work done by the engine on every frame (blits, pixels
+#   pushed to the display, collision pairs, sprites, text and image
+#   loads), so a slower frame can be traced to the code path doing more.
+#   The code paths add to the shared "work" counters, and the game loop
+#   closes a frame with work.end_frame().
+#====================================================================
+import itertools
+from collections import deque
+
+from const import FRAME_HISTORY
+
+# The counters, in the order they are reported
+COUNTERS = (
+    "blits",            # Surface blits issued
+    "updatedPixels",    # Area passed to pygame.display.update()
+    "collisionPairs",   # Sprite pairs whose rects overlap, tested further by PIXEL_COLLISIONS
+    "spritesCreated",   # Enemies and lasers spawned
+    "spritesKilled",    # Enemies and lasers removed
+    "fontRenders",      # Texts rasterized by a font (not cached)
+    "imageLoads",       # Images decoded on the main thread (not cached)
+    "steps",            # Simulation steps
+)
+
+
+class WorkCounters():
+    """
+    Work done during the current frame, and a history of the last frames.\n
+    Each counter is a plain attribute (see COUNTERS) so adding to it costs
+    no more than an attribute update.\n
+    @attr history [deque] - The counters of the last FRAME_HISTORY frames, as tuples\n
+    @attr totals [dict] - The counters summed over every frame\n
+    @attr frames [int] - Number of frames ended
+    """
+    def __init__(self, size=FRAME_HISTORY):
+        self.history = deque(maxlen=size)
+        self.totals = dict((name, 0) for name in COUNTERS)
+        self.frames = 0
+        self.reset()
+
+    def reset(self):
+        "Zero the counters of the current frame."
+        for name in COUNTERS:
+            setattr(self, name, 0)
+
+    def end_frame(self):
+        "Store the counters of the frame in the history and start the next one."
+        row = tuple(getattr(self, name) for name in COUNTERS)
+        self.history.append(row)
+        for (name, value) in zip(COUNTERS, row):
+            self.totals[name] += value
+        self.frames += 1
+        self.reset()
+
+    def averages(self, frames=60):
+        "Returns the average of each counter per frame over the last frames."
+        rows = list(itertools.islice(reversed(self.history), frames))
+        if not rows:
+            return dict((name, 0.0) for name in COUNTERS)
+        return dict((name, sum(row[i] for row in rows) / len(rows)) for (i, name) in enumerate(COUNTERS))
+
+    def stats(self):
+        "Returns the average of each counter per frame over every frame."
+        frames = max(self.frames, 1)
+        return dict((name, total / frames) for (name, total) in self.totals.items())
+
+    def report(self):
+        "Returns the averages per frame as printable text."
+        return ", ".join("%.1f %s" % (value, name) for (name, value) in self.stats().items())
+
+
+work = WorkCounters()
@@ -0,0 +1,266 @@
+#====================================================================
+# Name: environment.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Gym-style environments to train and evaluate automated players.
+#   An Environment plays one headless game with reset(seed) and
+#   step(action), and observes either a state vector or a downsampled
+#   frame. A VectorEnvironment steps many games together in one process
+#   and returns their observations as a single array.
+#
+#   env = VectorEnvironment(64, seed=0)
+#   observations = env.reset()
+#   (observations, rewards, terminated, truncated, infos) = env.step(actions)
+#====================================================================
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import itertools
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import pygame
+
+from const import SCREENRECT, WIDTH, HEIGHT, MAX_SHOT, MAX_E_ROW, MAX_E_COL
+from simulation import Simulation
+from render import BatchGroup
+from utils import load_image
+
+# The (direction, firing) input of each action
+ACTIONS = (
+    (0, False),     # 0 - Stay
+    (-1, False),    # 1 - Left
+    (1, False),     # 2 - Right
+    (0, True),      # 3 - Fire
+    (-1, True),     # 4 - Left and fire
+    (1, True),      # 5 - Right and fire
+)
+
+# Largest wave the simulation generates
+ENEMY_SLOTS = MAX_E_ROW * MAX_E_COL
+
+# Start of each part of the state vector
+PLAYER_X = 0
+LIVES = 1
+ENEMY_COUNT = 2
+ENEMIES = 3
+
+
+def flatten(positions, count):
+    "Returns the first count (x, y) positions as a flat array of x0, y0, x1, y1, ..."
+    if isinstance(positions, numpy.ndarray):
+        return positions[:count].ravel()
+    return numpy.fromiter(itertools.chain.from_iterable(positions), numpy.float32, 2 * count)
+
+
+def state_size(laserSlots=MAX_SHOT):
+    "Returns the length of the state vector."
+    return ENEMIES + 2 * ENEMY_SLOTS + 2 * laserSlots
+
+
+def frame_shape(frameScale):
+    "Returns the (height, width, 3) shape of the frames downsampled by frameScale."
+    return (-(-HEIGHT // frameScale), -(-WIDTH // frameScale), 3)
+
+
+class Environment():
+    """
+    A single headless game driven by actions (see ACTIONS).\n
+    The state vector holds the player x, the lives, the number of enemies,
+    the (x, y) of every enemy slot then the (x, y) of every laser slot. The
+    positions are divided by the screen size, empty slots are -1.\n
+    A frame is the BGRA screen seen as (height, width, RGB) with only every
+    frameScale'th pixel, a view of the drawn pixels and not a copy. The
+    returned observation is overwritten by the next step.\n
+    @attr observation [str] - "state" or "frame"\n
+    @attr frameScale [int] - Keep every frameScale'th row and column of a frame\n
+    @attr maxTicks [int] - Steps after which the game is truncated, or None\n
+    @attr simulation [Simulation] - The game being played\n
+    @attr episodes [int] - Number of reset() calls
+    """
+    def __init__(self, observation="state", backend=None, settings=None, frameScale=4,
+                 maxTicks=None, pixels=None, state=None):
+        if numpy is None:
+            raise ImportError("The environments require the numpy package")
+        if observation not in ("state", "frame"):
+            raise ValueError("Unknown observation '%s'" % observation)
+
+        self.observation = observation
+        self.backend = backend
+        self.settings = settings
+        self.frameScale = frameScale
+        self.maxTicks = maxTicks
+        self.simulation = None
+        self.episodes = 0
+
+        laserSlots = (settings or {}).get("MAX_SHOT", MAX_SHOT)
+        self.laserSlots = laserSlots
+        self.state = state if state is not None else numpy.empty(state_size(laserSlots), numpy.float32)
+        self.scale = numpy.array((WIDTH, HEIGHT), numpy.float32)
+        # (x, y) views of the enemy and laser slots of the state vector
+        self.enemyView = self.state[ENEMIES:ENEMIES + 2 * ENEMY_SLOTS].reshape(ENEMY_SLOTS, 2)
+        self.laserView = self.state[ENEMIES + 2 * ENEMY_SLOTS:].reshape(laserSlots, 2)
+
+        if observation == "frame":
+            # The screen draws straight into a NumPy array. A surfarray view
+            # would lock the surface and every blit would fail while it lives
+            if pixels is None:
+                pixels = numpy.zeros((HEIGHT, WIDTH, 4), numpy.uint8)
+            self.pixels = pixels
+            self.screen = pygame.image.frombuffer(pixels, SCREENRECT.size, "BGRA")
+            self.background = load_image("background2.gif")
+            self.frame = pixels[::frameScale, ::frameScale, 2::-1]
+
+    def reset(self, seed=None):
+        """
+        Start a new game.\n
+        @param seed [int] - The seed of the game, or None for a random one\n
+        Returns the first observation.
+        """
+        if self.simulation is not None:
+            self.simulation.close()
+
+        group = None
+        if self.observation == "frame":
+            group = BatchGroup()
+            self.screen.blit(self.background, (0, 0))
+        self.simulation = Simulation(group, self.backend, seed, self.settings)
+        self.simulation.initialize()
+        self.episodes += 1
+        return self.observe()
+
+    def step(self, action):
+        """
+        Play one tick of the game.\n
+        @param action [int] - The index of the input in ACTIONS\n
+        Returns (observation, reward, terminated, truncated, info), the reward
+        is the number of enemies destroyed during the tick.
+        """
+        simulation = self.simulation
+        score = simulation.score
+        simulation.set_input(*ACTIONS[action])
+        simulation.step()
+
+        terminated = simulation.is_over()
+        truncated = not terminated and self.maxTicks is not None and simulation.ticks >= self.maxTicks
+        info = {
+            "ticks": simulation.ticks,
+            "score": simulation.score,
+            "lives": max(simulation.player.lives, 0),
+            "waves": simulation.wavesCleared,
+        }
+        return (self.observe(), simulation.score - score, terminated, truncated, info)
+
+    def observe(self):
+        "Returns the observation of the current tick."
+        if self.observation == "frame":
+            group = self.simulation.group
+            group.clear(self.screen, self.background)
+            group.draw(self.screen)
+            return self.frame
+
+        simulation = self.simulation
+        state = self.state
+        state.fill(-1.0)
+        state[PLAYER_X] = simulation.player.rect.x / WIDTH
+        state[LIVES] = max(simulation.player.lives, 0)
+
+        enemies = simulation.entities.positions()
+        count = min(len(enemies), ENEMY_SLOTS)
+        state[ENEMY_COUNT] = count
+        if count:
+            slots = self.enemyView[:count]
+            slots.flat = flatten(enemies, count)
+            slots /= self.scale
+
+        lasers = simulation.entities.laser_positions()
+        count = min(len(lasers), self.laserSlots)
+        if count:
+            slots = self.laserView[:count]
+            slots.flat = flatten(lasers, count)
+            slots /= self.scale
+        return state
+
+    def close(self):
+        if self.simulation is not None:
+            self.simulation.close()
+            self.simulation = None
+
+
+class VectorEnvironment():
+    """
+    Steps count independent games together in one process.\n
+    The observations of every game are rows of a single array, so the batch
+    is returned without stacking. A game that ends is started again with the
+    next seed at once. Its row then holds the first observation of the new
+    game, and its info holds a copy of the last one ("final_observation")
+    and its final score.\n
+    @attr envs [list] - The Environment of each game\n
+    @attr observations [numpy.ndarray] - The observations, one row per game\n
+    @attr random [random.Random] - Picks the seed of every new game
+    """
+    def __init__(self, count, seed=None, observation="state", **options):
+        if numpy is None:
+            raise ImportError("The environments require the numpy package")
+
+        self.random = random.Random(seed)
+        self.rewards = numpy.zeros(count, numpy.int32)
+        self.terminated = numpy.zeros(count, bool)
+        self.truncated = numpy.zeros(count, bool)
+
+        frameScale = options.get("frameScale", 4)
+        self.envs = []
+        if observation == "frame":
+            pixels = numpy.zeros((count, HEIGHT, WIDTH, 4), numpy.uint8)
+            self.observations = pixels[:, ::frameScale, ::frameScale, 2::-1]
+            for i in range(count):
+                self.envs.append(Environment(observation, pixels=pixels[i], **options))
+        else:
+            laserSlots = (options.get("settings") or {}).get("MAX_SHOT", MAX_SHOT)
+            self.observations = numpy.empty((count, state_size(laserSlots)), numpy.float32)
+            for i in range(count):
+                self.envs.append(Environment(observation, state=self.observations[i], **options))
+
+    def __len__(self):
+        return len(self.envs)
+
+    def reset(self, seed=None):
+        """
+        Start a new game in every environment.\n
+        @param seed [int] - Seed the games again from this seed, or None to continue\n
+        Returns the observations.
+        """
+        if seed is not None:
+            self.random.seed(seed)
+        for env in self.envs:
+            env.reset(self.random.randrange(2**32))
+        return self.observations
+
+    def step(self, actions):
+        """
+        Play one tick of every game.\n
+        @param actions [sequence] - The action of each game\n
+        Returns (observations, rewards, terminated, truncated, infos).
+        """
+        infos = []
+        rewards = self.rewards
+        terminated = self.terminated
+        truncated = self.truncated
+        for (i, (env, action)) in enumerate(zip(self.envs, actions)):
+            (observation, rewards[i], terminated[i], truncated[i], info) = env.step(action)
+            if terminated[i] or truncated[i]:
+                info["final_observation"] = observation.copy()
+                info["final_score"] = info["score"]
+                env.reset(self.random.randrange(2**32))
+            infos.append(info)
+        return (self.observations, rewards, terminated, truncated, infos)
+
+    def close(self):
+        for env in self.envs:
+            env.close()
@@ -9,7 +9,9 @@
 #====================================================================
 import pygame
 
-from const import SCREENRECT, WIDTH, HEIGHT
+from const import SCREENRECT, WIDTH, HEIGHT, ENEMY_SPEED_LIMIT, ENEMY_SPEED_STEP, SPRITE_POOL_LIMIT
+from utils import load_font, render_text, GlyphAtlas
+from counters import work
 
 
 class Player(pygame.sprite.Sprite):
@@ -18,6 +20,8 @@ class Player(pygame.sprite.Sprite):
     The player is able to move left and right, and shoot a laser to destroy the Enemy.
     """
     image = None
+    mask = None     # Pixels of the image that collide, built once from the image
+    previous = None # Position before the last move, to draw in between updates
     shootSound = None
     gun_offset = -25
     lives = 3
@@ -37,6 +41,7 @@ class Player(pygame.sprite.Sprite):
         self.firing = 0
 
     def move(self):
+        self.previous = self.rect.topleft
         # Use the "facing" datamember to determine which direction to move sprite
         self.rect.move_ip(self.facing * self.speed, 0)
         # Prevent sprite from moving off screen
@@ -72,23 +77,124 @@ class Player(pygame.sprite.Sprite):
         self.firing = firing
 
 
-class Enemy(pygame.sprite.Sprite):
-    id = -1
+class SpritePool():
+    """
+    Keeps killed sprites so they can be reused instead of created again.\n
+    The pooled class sets up a sprite in spawn(), and gives it back to the
+    pool that created it when the sprite is killed. Each game owns its
+    pools, so their sprites are freed with the game.\n
+    @attr cls [type] - The class of the pooled sprites\n
+    @attr limit [int] - The maximum number of free sprites kept\n
+    @attr free [list] - The killed sprites waiting to be reused\n
+    @attr created [int] - Number of sprites created by the pool\n
+    @attr reused [int] - Number of sprites taken from the free list\n
+    @attr active [int] - Number of sprites currently spawned\n
+    @attr peak [int] - The highest number of sprites spawned at once
+    """
+    def __init__(self, cls, limit=SPRITE_POOL_LIMIT):
+        self.cls = cls
+        self.limit = limit
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.active = 0
+        self.peak = 0
+
+    def reserve(self, count):
+        "Create free sprites until the pool holds at least count of them."
+        while len(self.free) < min(count, self.limit):
+            self.free.append(self.__create())
+
+    def acquire(self, *args):
+        "Returns a spawned sprite, reusing a free one when possible."
+        if self.free:
+            sprite = self.free.pop()
+            self.reused += 1
+        else:
+            sprite = self.__create()
+        sprite.spawn(*args)
+        return sprite
+
+    def spawned(self):
+        self.active += 1
+        if self.active > self.peak:
+            self.peak = self.active
+
+    def release(self, sprite):
+        self.active -= 1
+        if len(self.free) < self.limit:
+            self.free.append(sprite)
+
+    def stats(self):
+        "Returns the pool counters as a dict."
+        return {
+            "free": len(self.free),
+            "active": self.active,
+            "peak": self.peak,
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+    def __create(self):
+        sprite = self.cls.__new__(self.cls)
+        pygame.sprite.Sprite.__init__(sprite)
+        sprite.active = False
+        sprite.pool = self
+        self.created += 1
+        return sprite
+
+
+class PooledSprite(pygame.sprite.Sprite):
+    """
+    A sprite that returns to the pool that created it when killed.\n
+    @attr active [bool] - True while the sprite is spawned\n
+    @attr pool [SpritePool] - The pool of the sprite, or None if it was created directly\n
+    @attr previous [tuple] - The position before the last update, None until the sprite moves
+    """
+    pool = None
+    previous = None
+
+    def kill(self):
+        pygame.sprite.Sprite.kill(self)
+        if self.active:
+            self.active = False
+            work.spritesKilled += 1
+            if self.pool is not None:
+                self.pool.release(self)
+
+    def activate(self):
+        "Add the sprite to its containers and count it as spawned."
+        self.active = True
+        # A reused sprite does not move from where it died
+        self.previous = None
+        work.spritesCreated += 1
+        self.add(self.containers)
+        if self.pool is not None:
+            self.pool.spawned()
+
+
+class Enemy(PooledSprite):
     image = None
-    startingX = 0
-    startingY = 0
-    startingDir = 1
+    mask = None     # Pixels of the image that collide, built once from the image
 
-    def __init__(self, id=0, speed=7, facing=1):
-        pygame.sprite.Sprite.__init__(self, self.containers)
+    def __init__(self, id=0, speed=7, facing=1, speedLimit=ENEMY_SPEED_LIMIT, speedStep=ENEMY_SPEED_STEP):
+        pygame.sprite.Sprite.__init__(self)
+        self.spawn(id, speed, facing, speedLimit, speedStep)
+
+    def spawn(self, id=0, speed=7, facing=1, speedLimit=ENEMY_SPEED_LIMIT, speedStep=ENEMY_SPEED_STEP):
         self.id = id
         self.speed = speed
         self.facing = facing
+        self.startingX = 0
+        self.startingY = 0
         self.startingDir = facing
+        self.speedLimit = speedLimit    # Speed reached after enough resets
+        self.speedStep = speedStep      # Speed gained on every reset
 
         self.rect = self.image.get_rect()
         self.changeDirection = False
         self.pixels = 0
+        self.activate()
 
     def set_position(self, x, y):
         (width, height) = self.image.get_size()
@@ -105,6 +211,7 @@ class Enemy(pygame.sprite.Sprite):
             self.rect.right = SCREENRECT.right - self.startingX
 
     def update(self):
+        self.previous = self.rect.topleft
         self.rect.move_ip(self.facing * self.speed, 0)
         if not SCREENRECT.contains(self.rect):
             # Ensure the Enemy sprite is within the boundaries of the screen
@@ -141,63 +248,91 @@ class Enemy(pygame.sprite.Sprite):
         self.pixels = pixels
 
     def increaseSpeed(self):
-        if self.speed < 12:
-            self.speed = self.speed + 1
+        if self.speed < self.speedLimit:
+            self.speed = min(self.speed + self.speedStep, self.speedLimit)
 
 
-class Laser(pygame.sprite.Sprite):
+class Laser(PooledSprite):
     image = None
+    mask = None     # Pixels of the image that collide, built once from the image
 
     def __init__(self, pos):
-        pygame.sprite.Sprite.__init__(self, self.containers)
+        pygame.sprite.Sprite.__init__(self)
+        self.spawn(pos)
+
+    def spawn(self, pos):
         self.speed = -9
         self.rect = self.image.get_rect(midbottom=pos)
+        self.activate()
 
     def update(self):
+        self.previous = self.rect.topleft
         self.rect.move_ip(0, self.speed)
         if self.rect.top <= 0:
             # Remove laser if past screen
             self.kill()
 
 
-class Score(pygame.sprite.Sprite):
-    def __init__(self):
+
+class Counter(pygame.sprite.Sprite):
+    """
+    A label followed by a number (ex. "Score: 10").\n
+    The label is rendered once and the digits are drawn from a glyph
+    atlas, so a new value does not rasterize any text.\n
+    @attr label [str] - The text in front of the number\n
+    @attr value [int] - The number to display
+    """
+    def __init__(self, label, value, pos, digits=6):
         pygame.sprite.Sprite.__init__(self)
-        self.font = pygame.font.SysFont("Courier", 20)
+        self.font = load_font("Courier", 20)
         self.color = (255, 255, 255)
-        self.score = 0
-        self.lastscore = -1
+        self.label = render_text(self.font, label, self.color)
+        self.glyphs = GlyphAtlas(self.font, self.color)
+        self.value = value
+        self.lastvalue = None
+
+        self.__allocate(digits)
+        self.rect = self.image.get_rect().move(pos)
         self.update()
-        self.rect = self.image.get_rect().move(10, 10)
 
     def update(self):
-        if self.score != self.lastscore:
-            self.lastscore = self.score
-            msg = "Score: %d" % self.score
-            self.image = self.font.render(msg, 0, self.color)
+        if self.value != self.lastvalue:
+            self.lastvalue = self.value
+            text = "%d" % self.value
+            if self.glyphs.advance * len(text) > self.image.get_width() - self.label.get_width():
+                self.__allocate(len(text))
+                self.rect.size = self.image.get_size()
+
+            # Clear the old number and draw the new one
+            x = self.label.get_width()
+            self.image.fill((0, 0, 0, 0), (x, 0, self.image.get_width() - x, self.image.get_height()))
+            self.glyphs.draw(self.image, text, (x, 0))
+
+    def __allocate(self, digits):
+        width = self.label.get_width() + self.glyphs.advance * digits
+        height = max(self.label.get_height(), self.glyphs.height)
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.image.blit(self.label, (0, 0))
+        self.lastvalue = None
+
+
+class Score(Counter):
+    def __init__(self):
+        Counter.__init__(self, "Score: ", 0, (10, 10))
 
     def increment(self):
-        self.score += 1
+        self.value += 1
+
+    def set_score(self, score):
+        self.value = score
 
     def get_score(self):
-        return self.score
+        return self.value
 
 
-class Lives(pygame.sprite.Sprite):
+class Lives(Counter):
     def __init__(self, lives):
-        pygame.sprite.Sprite.__init__(self)
-        self.font = pygame.font.SysFont("Courier", 20)
-        self.color = (255, 255, 255)
-        self.lives = lives
-        self.lastlives = -1
-        self.update()
-        self.rect = self.image.get_rect().move(10, 30)
-
-    def update(self):
-        if self.lives != self.lastlives:
-            self.lastlives = self.lives
-            msg = "Lives: %d" % self.lives
-            self.image = self.font.render(msg, 0, self.color)
+        Counter.__init__(self, "Lives: ", lives, (10, 30), digits=2)
 
     def set_lives(self, lives):
-        self.lives = lives
\ No newline at end of file
+        self.value = lives
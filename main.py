@@ -3,27 +3,99 @@
 # Created by: Austin Che
 # Created on: Aug 28, 2019
 #====================================================================
-from managers import GameManager
+import argparse
+import time
+
+start = time.perf_counter()
 
 
 def __main__():
+    parser = argparse.ArgumentParser(description="Jets and Aliens, IN SPACE!")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print the time spent reaching the first frame")
+    parser.add_argument("--frame-log", metavar="PATH",
+                        help="write the frame phase times to a .csv or .json file on exit (F4 writes it any time)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="record the input of every game (the games after the first are numbered)")
+    parser.add_argument("--replay", metavar="PATH", help="replay a recorded game")
+    parser.add_argument("--fast", action="store_true",
+                        help="with --replay, simulate without a display as fast as possible")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="save every presented frame, to a raw RGB24 stream for a .rgb or .raw file, "
+                             "else to PNG files in the PATH directory")
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="print the lines that allocated the most memory at every scene change (tracemalloc)")
+    parser.add_argument("--fps", type=int, default=None,
+                        help="most frames drawn per second, 0 for no limit (the game speed does not change)")
+    parser.add_argument("--fullscreen", action="store_true", help="fill the screen with the scaled game")
+    parser.add_argument("--vsync", action="store_true",
+                        help="present frames on the vertical sync, the frames are then not limited by --fps")
+    parser.add_argument("--doublebuf", action="store_true", help="ask for a double buffered display")
+    parser.add_argument("--no-scaled", dest="scaled", action="store_false", default=None,
+                        help="open a window of the size of the game, without scaling")
+    args = parser.parse_args()
+
+    if args.replay and args.fast:
+        from replay import run_headless
+        (simulation, seconds) = run_headless(args.replay)
+        print(f"Replayed {simulation.ticks} ticks in {seconds:.3f}s ({simulation.ticks / max(seconds, 1e-9):.0f} ticks/s)")
+        print(f"Score: {simulation.score}, lives: {simulation.player.lives}, seed: {simulation.seed}")
+        return 0
+
+    importing = time.perf_counter()
+    import const
+    from managers import GameManager
+    from app import ApplicationManager
+    fps = const.FPS if args.fps is None else args.fps
 
     manager = GameManager()
+    if args.scaled is not None:
+        manager.scaled = args.scaled
+    manager.fullscreen = manager.fullscreen or args.fullscreen
+    manager.vsync = manager.vsync or args.vsync
+    manager.doubleBuffer = manager.doubleBuffer or args.doublebuf
+    manager.startup.start = start
+    manager.startup.add("import", time.perf_counter() - importing)
+    manager.frameLog = args.frame_log
+    manager.capturePath = args.capture
+    if args.trace_alloc:
+        from profiling import AllocationTracker
+        manager.allocations = AllocationTracker()
     manager.initialize()
+    if manager.vsync and args.fps is None:
+        # The display already waits for the screen refresh
+        fps = 0
+
+    app = ApplicationManager()
+    app.recordPath = args.record
+    if args.replay:
+        from replay import InputLog
+        from scenes import GameScene
+        app.replayLog = InputLog(args.replay)
+        app.load_scene(GameScene())
 
     # Main game loop
     while manager.is_running():
-        manager.tick(60)
+        if manager.is_idle():
+            # Menus and the pause screen sleep until there is input
+            manager.wait()
+        else:
+            manager.tick(fps)
 
-        if manager.is_scene_loading():
+        # The next scene is switched to once its assets are decoded
+        if manager.is_scene_loading() and manager.scene_ready():
             manager.load_scene()
             manager.initialize_scene()
 
         manager.input()
 
         if not manager.is_paused():
-            manager.render()
             manager.update()
+            manager.render()
+
+            if args.profile_startup and manager.startup.finished is not None:
+                print(manager.startup.report())
+                args.profile_startup = False
 
     manager.quit()
     return 0
@@ -7,15 +7,24 @@
 #   The GameManger class controls the entire game.
 #====================================================================
 #pylint: disable=no-name-in-module
+import os
+import time
+
 import pygame
 from pygame.constants import (
-    K_ESCAPE, MOUSEBUTTONDOWN, QUIT, MOUSEMOTION, KEYDOWN, K_p
+    K_ESCAPE, QUIT, KEYDOWN, K_p, K_F3, K_F4, K_F6, VIDEOEXPOSE, WINDOWEXPOSED, NOEVENT
 )
 
+import colour
+import const
 from const import SCREENRECT
 from app import ApplicationManager, Singleton
-from utils import load_image
-from scenes import TitleScene
+from audio import AudioManager
+from utils import load_image, load_font, render_text, assets, AssetLoader
+from profiling import StartupProfiler, FrameTimer, FrameProfiler
+from counters import work
+import render
+from render import update_display
 
 
 class GameManager(Singleton):
@@ -24,57 +33,336 @@ class GameManager(Singleton):
     def init(self):
         self.title = "Jets and Aliens, IN SPACE!"
         self.currentScene = None
+        self.poolStats = {}
+        self.waitedEvent = None     # Event taken off the queue by wait()
+        self.startup = StartupProfiler()
+
+        # Decodes the assets of the scenes likely to be shown next
+        self.loader = AssetLoader()
+        self.prefetched = False
+
+        # Time spent in each phase of the main loop
+        self.timer = FrameTimer(("tick", "load_scene", "input", "update", "render", "present"))
+        self.overlay = None
+        self.showOverlay = False
+        self.frameLog = None
+
+        # cProfile captures of a few frames (F6), and the allocations of
+        # every scene when tracing them (--trace-alloc)
+        self.profiler = FrameProfiler()
+        self.allocations = None
+
+        # Display mode, chosen at startup (see set_display_mode)
+        self.scaled = const.SCALED_DISPLAY
+        self.fullscreen = const.FULLSCREEN
+        self.vsync = const.VSYNC
+        self.doubleBuffer = const.DOUBLE_BUFFER
+
+        # Saves the presented frames on a writer thread (see capture.py)
+        self.capturePath = None
+        self.capture = None
+
+        # Event type -> handlers, rebuilt for every scene (see set_handlers)
+        self.handlers = {}
+        self.keyActions = {
+            K_ESCAPE: self.stop,
+            K_p: self.toggle_pause,
+            K_F3: self.toggle_overlay,
+            K_F4: self.export_frame_times,
+            K_F6: self.profiler.toggle,
+        }
+
+        # Fixed timestep: the time of each frame is added to the accumulator,
+        # and a simulation step runs for every 1 / TICK_RATE seconds of it
+        self.accumulator = 0.0
+        self.lastTick = None
+        self.frameTime = 0.0
+        self.steps = 0          # Simulation steps run on the last frame
+        self.droppedTime = 0.0  # Seconds skipped to keep up after slow frames
 
     def initialize(self):
         "Initializes the pygame game engine"
-        #pylint: disable=no-member 
-        pygame.init()
-        #pylint: enable=no-member 
+        if self.allocations is not None:
+            self.allocations.start()
+
+        with self.startup.phase("init"):
+            # Only start the subsystems the first frame needs,
+            # the mixer is started when the first sound is loaded
+            AudioManager().pre_init()
+            pygame.display.init()
+            pygame.font.init()
 
-        # Set the display mode        
-        self.screen = pygame.display.set_mode(SCREENRECT.size)
+            # Set the display mode
+            self.screen = self.set_display_mode()
 
-        # Decorate the window
-        icon = load_image("icon.gif")
-        pygame.display.set_icon(icon)
-        pygame.display.set_caption(self.title)
-        
-        self.fpsClock = pygame.time.Clock()
+            if self.capturePath is not None:
+                from capture import FrameCapture
+                self.capture = FrameCapture(self.capturePath)
+                self.capture.start(self.screen)
 
-        # Load the scene
-        ApplicationManager().load_scene(TitleScene())
-        self.load_scene(ApplicationManager().get_scene())
-        self.initialize_scene()
+            # Decorate the window
+            icon = load_image("icon.gif")
+            pygame.display.set_icon(icon)
+            pygame.display.set_caption(self.title)
+
+            self.fpsClock = pygame.time.Clock()
+
+            from ui import FrameOverlay
+            self.overlay = FrameOverlay(self.timer, SCREENRECT.right - 250, 10, work=work)
+
+        with self.startup.phase("scene"):
+            from scenes import TitleScene
+
+            # Load the scene
+            ApplicationManager().load_scene(TitleScene())
+            self.load_scene(ApplicationManager().get_scene())
+            self.initialize_scene()
+
+        # SI_PROFILE_FRAMES=N profiles the first N frames
+        frames = os.environ.get("SI_PROFILE_FRAMES")
+        if frames:
+            count = int(frames) if frames.strip().isdigit() else 0
+            if count > 0:
+                self.profiler.start(count)
+            else:
+                print("Warning, SI_PROFILE_FRAMES must be a positive number of frames, not '%s'" % frames)
+
+    def set_display_mode(self):
+        """
+        Open the window. The game draws to a SCREENRECT sized surface whatever
+        the size of the window, with SCALED SDL stretches it to the window on
+        the GPU and maps the mouse back to the game coordinates.\n
+        Returns the display surface.
+        """
+        flags = 0
+        if self.scaled:
+            # The window can be resized freely, the frame keeps its size
+            flags |= pygame.SCALED | pygame.RESIZABLE
+        if self.fullscreen:
+            flags |= pygame.FULLSCREEN
+        if self.doubleBuffer:
+            flags |= pygame.DOUBLEBUF
+
+        # Only windows drawn by a renderer (SCALED) can wait for the vsync,
+        # vsync is left off when it is not available
+        self.vsync = self.vsync and self.scaled
+        render.renderer = self.scaled
+        try:
+            return pygame.display.set_mode(SCREENRECT.size, flags, vsync=int(self.vsync))
+        except pygame.error as e:
+            if not self.vsync:
+                raise
+            print("Warning, vsync is not available: %s" % e)
+            self.vsync = False
+            return pygame.display.set_mode(SCREENRECT.size, flags)
 
     def load_scene(self, scene=None):
+        if self.currentScene is not None:
+            self.close_scene()
         self.currentScene = scene
         if scene is None:
             self.currentScene = ApplicationManager().get_scene()
 
+    def close_scene(self):
+        "Close the current scene, and keep the pool counters of its game for the report."
+        self.currentScene.close()
+        simulation = getattr(self.currentScene, "simulation", None)
+        if simulation is not None:
+            self.poolStats = simulation.pool_stats()
+
+    def scene_ready(self):
+        """
+        Returns True once the assets of the scene waiting to be loaded are
+        decoded. Until then the current scene is frozen behind a loading indicator.
+        """
+        scene = ApplicationManager().get_scene()
+        return self.loader.request(scene.images, scene.sounds, scene.fonts, scene.modules)
+
+    def prefetch(self):
+        "Decode the assets of the scenes that may follow the current one in the background."
+        for scene in self.currentScene.next_scenes():
+            self.loader.request(scene.images, scene.sounds, scene.fonts, scene.modules)
+
     def initialize_scene(self):
         "Initialize the scene that is currently loaded"
+        self.timer.skip()
         self.currentScene.initialize()
         ApplicationManager().scene_initialized()
+        self.set_handlers()
+        self.prefetched = False
+        self.timer.lap("load_scene")
+        if self.allocations is not None:
+            self.allocations.transition(self.currentScene.sceneName)
+
+        # Do not catch up on the time spent loading
+        self.accumulator = 0.0
+        self.lastTick = time.perf_counter()
 
     def tick(self, fps):
+        "Wait for the next frame (fps of 0 does not wait), and measure the frame time."
+        self.timer.begin()
+        self.profiler.frame()
         self.fpsClock.tick(fps)
+        now = time.perf_counter()
+        if self.lastTick is not None:
+            self.frameTime = now - self.lastTick
+        self.lastTick = now
+        self.timer.lap("tick")
+
+    def set_handlers(self):
+        """
+        Build the dispatch table of the manager and the current scene, and
+        block every event type without a handler so SDL drops them (ex. the
+        flood of MOUSEMOTION events) before they reach the queue.
+        """
+        handlers = {
+            QUIT: [lambda event: self.stop()],
+            KEYDOWN: [self.on_key_down],
+            # The window contents were lost, redraw everything
+            VIDEOEXPOSE: [lambda event: self.currentScene.invalidate()],
+            WINDOWEXPOSED: [lambda event: self.currentScene.invalidate()],
+        }
+        for (eventType, handler) in self.currentScene.event_handlers().items():
+            handlers.setdefault(eventType, []).append(handler)
+        self.handlers = handlers
+
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(list(handlers) + list(self.currentScene.wake_events()))
+
+    def is_idle(self):
+        "Returns True if nothing changes on screen until an event arrives."
+        if self.is_scene_loading() or self.showOverlay or self.startup.finished is None:
+            return False
+        return self.is_paused() or self.currentScene.is_static()
+
+    def wait(self, timeout=const.IDLE_TIMEOUT):
+        """
+        Sleep until an event arrives or the timeout (in milliseconds) ends,
+        instead of ticking at the frame rate.
+        """
+        self.timer.begin()
+        self.profiler.frame()
+        event = pygame.event.wait(timeout)
+        if event.type != NOEVENT:
+            # It is the oldest event, input() dispatches it before the queue
+            self.waitedEvent = event
+
+        # The time spent waiting is not simulated
+        self.frameTime = 0.0
+        self.lastTick = time.perf_counter()
+        self.timer.lap("tick")
 
     def input(self):
-        for event in pygame.event.get():
-            if event.type == QUIT:
-                ApplicationManager().running = False
-            if event.type == KEYDOWN and event.key == K_ESCAPE:
-                ApplicationManager().running = False
-            if event.type == KEYDOWN and event.key == K_p:
-                ApplicationManager().paused = not ApplicationManager().paused
+        "Dispatch the queued events, then let the scene sample the input state once."
+        # Take in the assets decoded in the background since the last pass
+        self.loader.poll()
+        handlers = self.handlers
+        events = pygame.event.get()
+        if self.waitedEvent is not None:
+            events.insert(0, self.waitedEvent)
+            self.waitedEvent = None
+        for event in events:
+            for handler in handlers.get(event.type, ()):
+                handler(event)
+        if not self.is_scene_loading():
+            self.currentScene.sample_input()
+        self.timer.lap("input")
+
+    def on_key_down(self, event):
+        action = self.keyActions.get(event.key)
+        if action is not None:
+            action()
 
-            self.currentScene.handle_events(event)
+    def stop(self):
+        ApplicationManager().running = False
+
+    def toggle_pause(self):
+        ApplicationManager().paused = not ApplicationManager().paused
+
+    def toggle_overlay(self):
+        self.showOverlay = not self.showOverlay
+        # Erase the overlay from the screen
+        self.currentScene.invalidate()
 
     def render(self):
+        if self.startup.finished is None:
+            with self.startup.phase("first frame"):
+                self.currentScene.render(self.screen)
+                self.currentScene.present()
+            self.startup.finish()
+            if self.capture is not None:
+                self.capture.capture(self.screen)
+            self.end_frame()
+            return
+
+        self.timer.skip()
         self.currentScene.render(self.screen)
+        extraRects = []
+        if self.is_scene_loading():
+            extraRects.append(self.draw_loading(self.screen))
+        if self.showOverlay:
+            extraRects.append(self.overlay.draw(self.screen))
+        self.timer.lap("render")
+
+        self.currentScene.present()
+        if extraRects:
+            update_display(extraRects)
+        if self.capture is not None:
+            self.capture.capture(self.screen)
+        self.timer.lap("present")
+        self.end_frame()
+
+        if not self.prefetched:
+            # Once the scene is up, decode the assets of the next scenes
+            # so changing scenes does not read from the disk
+            self.prefetched = True
+            self.prefetch()
+
+    def end_frame(self):
+        "Close the work counters of the frame drawn."
+        work.end_frame()
+
+    def draw_loading(self, screen):
+        "Draw the loading indicator over the frame. Returns the rect drawn."
+        font = load_font("courier", 20)
+        dots = "." * (1 + int(time.perf_counter() * 4) % 3)
+        text = render_text(font, "LOADING" + dots, colour.WHITE)
+        (width, height) = font.size("LOADING...")
+        rect = pygame.Rect(0, 0, width + 8, height + 4)
+        rect.bottomright = (SCREENRECT.right - 10, SCREENRECT.bottom - 10)
+        screen.fill(colour.BLACK, rect)
+        screen.blit(text, (rect.x + 4, rect.y + 2))
+        return rect
 
     def update(self):
-        self.currentScene.update()
+        "Run the simulation steps that are due, at most MAX_CATCH_UP of them."
+        self.timer.skip()
+        if self.is_scene_loading():
+            # The scene is about to be replaced
+            self.timer.lap("update")
+            return
+        step = 1.0 / const.TICK_RATE
+        self.accumulator += self.frameTime
+        self.steps = 0
+        while self.accumulator >= step:
+            if self.steps == const.MAX_CATCH_UP:
+                # Too far behind, drop the time instead of making the next frames even longer
+                self.droppedTime += self.accumulator - self.accumulator % step
+                self.accumulator %= step
+                break
+            self.currentScene.update()
+            self.accumulator -= step
+            self.steps += 1
+            if self.is_scene_loading():
+                break
+        self.currentScene.alpha = min(self.accumulator / step, 1.0)
+        self.timer.lap("update")
+
+    def export_frame_times(self):
+        "Write the recorded frame times to the frame log (default frametimes.csv)."
+        path = self.frameLog or "frametimes.csv"
+        self.timer.export(path)
+        print(f"Frame times written to '{path}'")
 
     def is_running(self):
         return ApplicationManager().running
@@ -87,6 +375,23 @@ class GameManager(Singleton):
 
     def quit(self):
         print("Ending the program...")
+        self.loader.stop()
+        if self.currentScene is not None:
+            self.close_scene()
+        if self.frameLog is not None:
+            self.export_frame_times()
+        self.profiler.stop()
+        print("Work per frame: %s" % work.report())
+        print("Dropped time: %.3f s skipped to keep up after slow frames" % self.droppedTime)
+        if self.capture is not None:
+            self.capture.stop()
+            print("Capture: %(captured)d captured, %(skipped)d skipped, %(dropped)d dropped, %(written)d written" % self.capture.stats())
+        print("Asset cache: %(hits)d hits, %(misses)d misses, %(bytes)d bytes" % assets.stats())
+        print("Audio: %(played)d played, %(stolen)d stolen, %(dropped)d dropped, "
+              "buffer latency %(buffer_ms).1f ms" % AudioManager().stats())
+        for (name, stats) in self.poolStats.items():
+            print(("%s pool of the last game: " % name) +
+                  "%(created)d created, %(reused)d reused, %(peak)d peak, %(free)d free" % stats)
         #pylint: disable=no-member
         pygame.quit()
         #pylint: enable=no-member
@@ -0,0 +1,243 @@
+#====================================================================
+# Name: profiling.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Helpers to measure where the game spends its time and memory.
+#====================================================================
+import cProfile
+import csv
+import json
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from const import FRAME_HISTORY, PROFILE_FRAMES, TRACEMALLOC_FRAMES, TRACEMALLOC_TOP
+from utils import assets, fonts
+
+
+class StartupProfiler():
+    """
+    Breaks down the time to the first drawn frame into phases.\n
+    Font and asset loading are reported as their own phases, and the time
+    spent on them is subtracted from the phase that triggered them.\n
+    @attr start [float] - The perf_counter() value the program started at\n
+    @attr phases [OrderedDict] - The seconds spent in each phase
+    """
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = OrderedDict()
+        self.finished = None
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        "Time the block as the phase called name."
+        loading = fonts.loadTime + assets.loadTime
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - begin
+            self.add(name, elapsed - (fonts.loadTime + assets.loadTime - loading))
+
+    def finish(self):
+        "Mark the first frame as presented."
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    def report(self):
+        "Returns the breakdown as printable text."
+        phases = OrderedDict(self.phases)
+        phases["font"] = fonts.loadTime
+        phases["asset"] = assets.loadTime
+
+        total = (self.finished or time.perf_counter()) - self.start
+        lines = ["Startup profile (time to first frame)"]
+        for (name, seconds) in phases.items():
+            lines.append("  %-12s %8.1f ms  %5.1f%%" % (name, seconds * 1000, seconds / total * 100))
+        other = total - sum(phases.values())
+        lines.append("  %-12s %8.1f ms  %5.1f%%" % ("other", other * 1000, other / total * 100))
+        lines.append("  %-12s %8.1f ms" % ("total", total * 1000))
+        return "\n".join(lines)
+
+
+class FrameTimer():
+    """
+    Records the time spent in each phase of a frame into a fixed-size
+    ring buffer, so the last frames can be drawn or exported.\n
+    @attr phases [tuple] - The names of the phases, in the order of a frame\n
+    @attr size [int] - The number of frames kept\n
+    @attr count [int] - The number of frames recorded so far
+    """
+    def __init__(self, phases, size=FRAME_HISTORY):
+        self.phases = tuple(phases)
+        self.columns = dict((phase, i) for (i, phase) in enumerate(self.phases))
+        self.size = size
+        self.samples = array("d", bytes(8 * size * len(self.phases)))
+        self.current = array("d", bytes(8 * len(self.phases)))
+        self.count = 0
+        self.last = None
+        self.inFrame = False
+
+    def begin(self):
+        "Start a new frame, and store the previous one in the ring buffer."
+        if self.inFrame:
+            width = len(self.phases)
+            start = (self.count % self.size) * width
+            self.samples[start:start + width] = self.current
+            self.count += 1
+            for i in range(width):
+                self.current[i] = 0.0
+        self.inFrame = True
+        self.last = time.perf_counter()
+
+    def lap(self, phase):
+        "Add the time since the last lap (or the start of the frame) to the phase."
+        now = time.perf_counter()
+        if self.inFrame:
+            self.current[self.columns[phase]] += now - self.last
+        self.last = now
+
+    def skip(self):
+        "Restart the lap timer without charging the time to any phase."
+        self.last = time.perf_counter()
+
+    def rows(self, frames=None):
+        """
+        Returns the recorded frames from oldest to newest, as lists of seconds per phase.\n
+        @param frames [int] - Only return the last frames, or None for every recorded frame
+        """
+        width = len(self.phases)
+        frames = min(self.count, self.size, self.size if frames is None else frames)
+        first = self.count - frames
+        rows = []
+        for frame in range(first, self.count):
+            start = (frame % self.size) * width
+            rows.append(self.samples[start:start + width].tolist())
+        return rows
+
+    def last_row(self):
+        "Returns the seconds per phase of the last recorded frame, or None."
+        if not self.count:
+            return None
+        width = len(self.phases)
+        start = ((self.count - 1) % self.size) * width
+        return self.samples[start:start + width].tolist()
+
+    def averages(self, frames=60):
+        "Returns the average seconds of each phase over the last frames."
+        rows = self.rows(frames)
+        if not rows:
+            return dict((phase, 0.0) for phase in self.phases)
+        return dict((phase, sum(row[i] for row in rows) / len(rows)) for (i, phase) in enumerate(self.phases))
+
+    def export(self, path):
+        "Write the recorded frames in milliseconds to a .csv or .json file."
+        rows = [[seconds * 1000 for seconds in row] for row in self.rows()]
+        first = self.count - len(rows)
+        with open(path, "w", newline="") as f:
+            if path.lower().endswith(".json"):
+                json.dump({
+                    "phases": self.phases,
+                    "unit": "ms",
+                    "frames": [dict(zip(("frame",) + self.phases, [first + i] + row)) for (i, row) in enumerate(rows)],
+                }, f, indent=1)
+            else:
+                writer = csv.writer(f)
+                writer.writerow(("frame",) + self.phases + ("total",))
+                for (i, row) in enumerate(rows):
+                    writer.writerow([first + i] + ["%.4f" % ms for ms in row] + ["%.4f" % sum(row)])
+
+
+class FrameProfiler():
+    """
+    Runs cProfile over a number of frames and writes the result to a
+    .pstats file, to open with pstats or snakeviz.\n
+    A frame is one pass of the main loop, counted by frame() whether it
+    draws or not, so a capture started while paused or in a menu ends too.
+    Idle passes wait for input, so there they last up to IDLE_TIMEOUT.\n
+    @attr profile [cProfile.Profile] - The running capture, or None\n
+    @attr remaining [int] - Frames left to capture\n
+    @attr captures [int] - Number of captures written
+    """
+    def __init__(self):
+        self.profile = None
+        self.remaining = 0
+        self.captures = 0
+
+    def is_running(self):
+        return self.profile is not None
+
+    def start(self, frames=PROFILE_FRAMES):
+        if self.profile is not None:
+            return
+        print(f"Profiling the next {frames} frames...")
+        self.remaining = frames
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        "End the capture and write it to profile-<time>.pstats."
+        if self.profile is None:
+            return
+        self.profile.disable()
+        path = "profile-%s-%d.pstats" % (time.strftime("%Y%m%d-%H%M%S"), self.captures)
+        self.profile.dump_stats(path)
+        self.profile = None
+        self.captures += 1
+        print(f"Profile written to '{path}'")
+
+    def toggle(self):
+        if self.profile is None:
+            self.start()
+        else:
+            self.stop()
+
+    def frame(self):
+        "Count a pass of the main loop, the capture stops after the requested number."
+        if self.profile is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.stop()
+
+
+class AllocationTracker():
+    """
+    Takes a tracemalloc snapshot at every scene change and prints the lines
+    that allocated the most memory since the last one.\n
+    @attr last [tracemalloc.Snapshot] - The snapshot of the previous scene change\n
+    @attr top [int] - The number of lines printed
+    """
+    def __init__(self, top=TRACEMALLOC_TOP):
+        self.last = None
+        self.top = top
+
+    def start(self):
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.last = self.__snapshot()
+
+    def transition(self, name):
+        "Print what was allocated since the last scene change."
+        if self.last is None:
+            return
+        snapshot = self.__snapshot()
+        stats = snapshot.compare_to(self.last, "lineno")
+        (current, peak) = tracemalloc.get_traced_memory()
+        print(f"Allocations since the last scene change, with the '{name}' scene loaded "
+              f"({current / 1024:.0f} KiB traced, {peak / 1024:.0f} KiB peak):")
+        for stat in stats[:self.top]:
+            print("  %s" % stat)
+        self.last = snapshot
+
+    def __snapshot(self):
+        # Leave out the memory of tracemalloc itself and of the import system
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
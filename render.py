@@ -0,0 +1,116 @@
+#====================================================================
+# Name: render.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Sprite group that draws all of its sprites with one batched call
+#   (Surface.blits, or Surface.fblits where pygame provides it) and
+#   tracks the changed areas of the screen like RenderUpdates.
+#====================================================================
+import pygame
+
+from const import SCREENRECT
+from counters import work
+
+
+# True while the display is presented by an SDL renderer (SCALED). The
+# renderer uploads the whole frame on every update, whatever the rects
+renderer = False
+
+
+def update_display(rects=None):
+    "pygame.display.update() that counts the pixels pushed to the display."
+    if rects is None or renderer:
+        work.updatedPixels += SCREENRECT.w * SCREENRECT.h
+    else:
+        work.updatedPixels += sum(rect.w * rect.h for rect in rects)
+    if rects is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(rects)
+
+
+class BatchGroup(pygame.sprite.RenderUpdates):
+    """
+    A RenderUpdates group that draws its sprites in a single batch.\n
+    Sprites sharing an image are drawn one after the other, the images in
+    the order they joined the group (ex. every spider.gif enemy, then the
+    score, then the lasers). A sprite that swaps its image (ex. a Counter
+    that grows) is moved to the bucket of its new image by the next draw().
+    """
+    def __init__(self, *sprites):
+        self.buckets = {}       # image -> {sprite: None}, in drawing order
+        self.spriteImage = {}   # sprite -> the image it was bucketed by
+        self.dirty = []
+        pygame.sprite.RenderUpdates.__init__(self, *sprites)
+
+    def add_internal(self, sprite, layer=None):
+        pygame.sprite.RenderUpdates.add_internal(self, sprite, layer)
+        # A sprite may join its groups before its image is set, it is
+        # then bucketed by its image on the first draw()
+        self.__bucket(sprite, getattr(sprite, "image", None))
+
+    def remove_internal(self, sprite):
+        pygame.sprite.RenderUpdates.remove_internal(self, sprite)
+        self.__unbucket(sprite)
+
+    def clear(self, surface, bgd):
+        work.blits += len(self.lostsprites) + len(self.spritedict)
+        pygame.sprite.RenderUpdates.clear(self, surface, bgd)
+
+    def draw(self, surface, bgsurf=None, special_flags=0):
+        """
+        Draw every sprite with a single blits() call.\n
+        Returns the dirty rects. The list is reused by the next draw(), so
+        copy it to keep it longer.
+        """
+        changed = [sprite for (sprite, image) in self.spriteImage.items() if sprite.image is not image]
+        for sprite in changed:
+            self.__unbucket(sprite)
+            self.__bucket(sprite, sprite.image)
+
+        order = [sprite for bucket in self.buckets.values() for sprite in bucket]
+        batch = [(sprite.image, sprite.rect) for sprite in order]
+        work.blits += len(batch)
+        if hasattr(surface, "fblits") and not special_flags:
+            # fblits() does not return the rects, work out the clipped areas
+            surface.fblits(batch)
+            clip = surface.get_clip()
+            rects = [pygame.Rect(rect.topleft, image.get_size()).clip(clip) for (image, rect) in batch]
+        else:
+            if special_flags:
+                batch = [(image, rect, None, special_flags) for (image, rect) in batch]
+            rects = surface.blits(batch)
+
+        dirty = self.dirty
+        dirty.clear()
+        dirty.extend(self.lostsprites)
+        del self.lostsprites[:]
+
+        spritedict = self.spritedict
+        for (sprite, new) in zip(order, rects):
+            old = spritedict[sprite]
+            if old:
+                if new.colliderect(old):
+                    dirty.append(new.union(old))
+                else:
+                    dirty.append(new)
+                    dirty.append(old)
+            else:
+                dirty.append(new)
+            spritedict[sprite] = new
+        return dirty
+
+    def __bucket(self, sprite, image):
+        self.spriteImage[sprite] = image
+        bucket = self.buckets.get(image)
+        if bucket is None:
+            bucket = self.buckets[image] = {}
+        bucket[sprite] = None
+
+    def __unbucket(self, sprite):
+        image = self.spriteImage.pop(sprite)
+        bucket = self.buckets[image]
+        del bucket[sprite]
+        if not bucket:
+            del self.buckets[image]
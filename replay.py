@@ -0,0 +1,160 @@
+#====================================================================
+# Name: replay.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Records the player input of a game and replays it. A game is fully
+#   defined by the seed of its simulation and the input of every tick,
+#   so a replay reproduces the recorded game exactly, once the
+#   settings of the simulation are restored.
+#
+#   File layout (little-endian):
+#       header  - magic, format version, seed, number of ticks,
+#                 number of settings
+#       settings- the name and value of every setting of the simulation
+#       runs    - one byte of input bits followed by the length of
+#                 the run as a LEB128 varint, until the end of file
+#====================================================================
+import struct
+import time
+
+MAGIC = b"SIREPLAY"
+HEADER = struct.Struct("<8sHQIB")
+SETTING = struct.Struct("<32si")
+
+# Version of the file layout, raised when the layout or the meaning of
+# the recorded input changes
+VERSION = 2
+
+# Input bits of a tick
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+
+
+def encode_input(direction, firing):
+    "Pack the player input of a tick into bits."
+    bits = FIRE if firing else 0
+    if direction < 0:
+        bits |= LEFT
+    elif direction > 0:
+        bits |= RIGHT
+    return bits
+
+
+def decode_input(bits):
+    "Returns the (direction, firing) of the input bits."
+    direction = (1 if bits & RIGHT else 0) - (1 if bits & LEFT else 0)
+    return (direction, bool(bits & FIRE))
+
+
+class InputRecorder():
+    """
+    Records the input of every tick as run-length encoded bitfields.\n
+    @attr seed [int] - The seed of the recorded simulation\n
+    @attr settings [dict] - The settings of the recorded simulation\n
+    @attr ticks [int] - The number of ticks recorded\n
+    @attr runs [list] - The [bits, count] runs of input
+    """
+    def __init__(self, seed, settings=None):
+        self.seed = seed
+        self.settings = dict(settings or {})
+        self.ticks = 0
+        self.runs = []
+
+    def record(self, direction, firing):
+        bits = encode_input(direction, firing)
+        if self.runs and self.runs[-1][0] == bits:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([bits, 1])
+        self.ticks += 1
+
+    def save(self, path):
+        data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, len(self.settings)))
+        for (name, value) in sorted(self.settings.items()):
+            data += SETTING.pack(name.encode(), int(value))
+        for (bits, count) in self.runs:
+            data.append(bits)
+            # LEB128: 7 bits per byte, high bit set on every byte but the last
+            while count >= 0x80:
+                data.append((count & 0x7f) | 0x80)
+                count >>= 7
+            data.append(count)
+        with open(path, "wb") as f:
+            f.write(data)
+
+
+class InputLog():
+    """
+    A recorded game loaded from a file.\n
+    @attr version [int] - The format version of the file\n
+    @attr seed [int] - The seed of the recorded simulation\n
+    @attr settings [dict] - The settings of the recorded simulation\n
+    @attr ticks [int] - The number of ticks recorded\n
+    @attr runs [list] - The (bits, count) runs of input
+    """
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+            raise ValueError('"%s" is not a replay file' % path)
+        (magic, self.version) = struct.unpack_from("<8sH", data, 0)
+        if self.version != VERSION:
+            raise ValueError('"%s" is a version %d replay, expected version %d' % (path, self.version, VERSION))
+        (magic, self.version, self.seed, self.ticks, count) = HEADER.unpack_from(data, 0)
+
+        self.settings = {}
+        pos = HEADER.size
+        if len(data) < pos + SETTING.size * count:
+            raise ValueError('"%s" is cut short' % path)
+        for i in range(count):
+            (name, value) = SETTING.unpack_from(data, pos)
+            self.settings[name.rstrip(b"\0").decode()] = value
+            pos += SETTING.size
+
+        self.runs = []
+        while pos < len(data):
+            bits = data[pos]
+            pos += 1
+            (count, shift) = (0, 0)
+            while True:
+                if pos >= len(data):
+                    raise ValueError('"%s" is cut short' % path)
+                byte = data[pos]
+                pos += 1
+                count |= (byte & 0x7f) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            self.runs.append((bits, count))
+        if sum(count for (bits, count) in self.runs) != self.ticks:
+            raise ValueError('"%s" does not hold the %d ticks of its header' % (path, self.ticks))
+
+    def inputs(self):
+        "Yields the (direction, firing) input of every tick."
+        for (bits, count) in self.runs:
+            tick = decode_input(bits)
+            for i in range(count):
+                yield tick
+
+
+def run_headless(path, backend=None):
+    """
+    Replay a recorded game without a display, as fast as possible.\n
+    Returns the finished Simulation and the seconds it took.
+    """
+    from simulation import Simulation
+
+    log = InputLog(path)
+    simulation = Simulation(backend=backend, seed=log.seed, settings=log.settings)
+    simulation.initialize()
+
+    start = time.perf_counter()
+    for (direction, firing) in log.inputs():
+        simulation.set_input(direction, firing)
+        simulation.step()
+        if simulation.is_over():
+            break
+    return (simulation, time.perf_counter() - start)
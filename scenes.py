@@ -7,7 +7,6 @@
 # Description:
 #   This file contains all the scenes (levels).
 #====================================================================
-import random, math
 from abc import ABCMeta
 
 import pygame
@@ -16,13 +15,27 @@ import colour
 import const
 from const import SCREENRECT
 from app import ApplicationManager
-from utils import load_image, load_sound
-from ui import Text, Button, Justify
-from gameobjects import Player, Enemy, Laser, Score, Lives
+from audio import AudioManager
+from utils import load_image
+from ui import Text, Button, ButtonLayer, Justify
+from render import BatchGroup, update_display
+from counters import work
 
 
 class Scene(metaclass=ABCMeta):
 
+    # How far the time of the frame is between the last two updates (0 - 1),
+    # set before render() so moving sprites can be drawn in between
+    alpha = 1.0
+
+    # The assets initialize() loads, decoded in the background before the
+    # scene is shown: image and sound files, (face, size) fonts and the
+    # modules it imports
+    images = ()
+    sounds = ()
+    fonts = ()
+    modules = ()
+
     def initialize(self):
         raise NotImplementedError
 
@@ -32,17 +45,111 @@ class Scene(metaclass=ABCMeta):
     def update(self):
         raise NotImplementedError
 
-    def handle_events(self, event):
+    def event_handlers(self):
+        """
+        Returns the event type -> handler(event) table of the scene.\n
+        Event types no scene or manager handles are blocked.
+        """
+        return {}
+
+    def sample_input(self):
+        "Read the continuous input state (keys held, mouse), once per frame."
+        pass
+
+    def is_static(self):
+        """
+        Returns True if the scene only changes on input, so the game can
+        sleep until an event arrives instead of drawing frames.
+        """
+        return False
+
+    def wake_events(self):
+        "Returns the event types that can change a static scene, besides the handled ones."
+        return ()
+
+    def next_scenes(self):
+        "Returns the scene classes likely to follow this one, their assets are loaded in the background."
+        return ()
+
+    def present(self):
+        "Push the rendered frame to the display."
+        update_display()
+
+    def invalidate(self):
+        "Request a full redraw of the screen on the next frame."
+        pass
+
+    def close(self):
+        "Called when the scene is replaced by the next one, or when the program ends while it is loaded."
+        pass
+
+
+class MenuScene(Scene):
+    """
+    A scene of static images and buttons. The screen is drawn once, then
+    only the buttons whose state changed are redrawn and pushed to the display.
+    """
+    def __init__(self):
+        super(MenuScene, self).__init__()
+        self.fullRedraw = True
+        self.dirtyRects = []
+
+    def invalidate(self):
+        self.fullRedraw = True
+
+    def is_static(self):
+        return not self.fullRedraw
+
+    def buttons(self):
+        "Returns the ButtonLayer on screen, driven by the mouse."
         raise NotImplementedError
 
+    def event_handlers(self):
+        return {
+            pygame.MOUSEBUTTONDOWN: self.on_mouse_down,
+            pygame.MOUSEBUTTONUP: self.on_mouse_up,
+        }
+
+    def on_mouse_down(self, event):
+        if event.button == 1:
+            for button in self.buttons().buttons:
+                button.press(event.pos)
+
+    def on_mouse_up(self, event):
+        if event.button == 1:
+            for button in self.buttons().buttons:
+                button.release(event.pos)
+
+    def sample_input(self):
+        # Clicks are handled as events, only the hover state is polled
+        mouse = pygame.mouse.get_pos()
+        for button in self.buttons().buttons:
+            button.hover(mouse)
 
-class TitleScene(Scene):
+    def wake_events(self):
+        # The buttons change when hovered
+        return (pygame.MOUSEMOTION,)
+
+    def present(self):
+        if self.fullRedraw:
+            self.fullRedraw = False
+            update_display()
+        elif self.dirtyRects:
+            update_display(self.dirtyRects)
+
+
+class TitleScene(MenuScene):
+    images = ("intro.png", "instructions.png")
+    fonts = (("courier", 50),)
 
     def __init__(self):
         super(TitleScene, self).__init__()
         self.id = 1
         self.sceneName = "title"
 
+    def next_scenes(self):
+        return (GameScene,)
+
     def initialize(self):
         print(f"Initializing the '{self.sceneName}' level...")
 
@@ -66,20 +173,23 @@ class TitleScene(Scene):
         self.background = load_image("intro.png")
         self.instructions = load_image("instructions.png")
 
+        self.menuButtons = ButtonLayer(self.startBtn, self.infoBtn, self.quitBtn)
+        self.infoButtons = ButtonLayer(self.backBtn)
+
         self.startGame = False
         self.quitGame = False
         self.showInstructions = False
 
-    def handle_events(self, event):
-        self.startBtn.handle_events()
-        self.infoBtn.handle_events()
-        self.quitBtn.handle_events()
-        self.backBtn.handle_events()
+    def buttons(self):
+        return self.infoButtons if self.showInstructions else self.menuButtons
+
+    def sample_input(self):
+        super(TitleScene, self).sample_input()
 
         if self.startGame is True:
             ApplicationManager().load_scene(GameScene())
 
-        if event.type == pygame.MOUSEBUTTONDOWN and self.quitGame:
+        if self.quitGame:
             # QUIT button clicked, exit the program
             ApplicationManager().running = False
 
@@ -87,165 +197,221 @@ class TitleScene(Scene):
 
         if self.showInstructions is False:
             # Draw the title screen
-            screen.blit(self.background, (0, 0))
-            self.startBtn.render(screen)
-            self.infoBtn.render(screen)
-            self.quitBtn.render(screen)
+            (background, buttons) = (self.background, self.menuButtons)
         else:
             # Draw the info screen
-            screen.blit(self.instructions, (0, 0))
-            self.backBtn.render(screen)
+            (background, buttons) = (self.instructions, self.infoButtons)
+
+        if self.fullRedraw:
+            work.blits += 1
+            screen.blit(background, (0, 0))
+            buttons.invalidate()
+        self.dirtyRects = buttons.draw(screen, background)
 
     def update(self):
-        pygame.display.update()
+        pass
 
     def __onStartBtnClicked(self):
         self.startGame = True
 
     def __onInfoBtnClicked(self):
         self.showInstructions = True
+        self.invalidate()
 
     def __onBackBtnClicked(self):
-        self.showInstructions = False        
+        self.showInstructions = False
+        self.invalidate()
 
     def __onQuitBtnClicked(self):
         self.quitGame = True
 
 
 class GameScene(Scene):
+    images = ("background2.gif", "player.gif", "laser.gif", "spider.gif")
+    sounds = ("laser.ogg",)
+    fonts = (("courier", 20),)
+    modules = ("gameobjects", "simulation")
 
-    def __init__(self):
+    def __init__(self, simulation=None):
         super(GameScene, self).__init__()
         self.id = 2
         self.sceneName = "game"
 
-        self.spawnFactor = 0
-        self.speedFactor = 0
-        self.resetEnemy = False
+        # A configured simulation can be passed in (ex. benchmarks), it is
+        # initialized by the scene
+        self.simulation = simulation
+
+        self.dirtyRects = []
+        self.fullRedraw = True
+
+        # Player input applied on the next tick
+        self.direction = 0
+        self.firing = False
+        self.recorder = None
+        self.replayInputs = None
+
+    def next_scenes(self):
+        return (GameOverScene,)
 
     def initialize(self):
         print(f"Initializing the '{self.sceneName}' level...")
+        # The game modules are imported when the first round starts,
+        # so they are not on the path to the title screen
+        from gameobjects import Player, Score, Lives
+        from simulation import Simulation
 
         # Loading resources (images, audio, etc.) before beginning scene
-        Player.image = load_image("player.gif")
-        Player.shootSound = load_sound("laser.ogg")
-        Laser.image = load_image("laser.gif")
-        Enemy.image = load_image("spider.gif")
-        self.background = load_image("background2.gif").convert()
+        Player.shootSound = AudioManager().load("laser.ogg")
+        self.background = load_image("background2.gif")
 
         # Initialize sprite group
-        self.lasers = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
-        self.all = pygame.sprite.RenderUpdates()
-
-        # Assign groups to sprites
-        Laser.containers = self.lasers, self.all
-        Enemy.containers = self.aliens, self.all
-        Player.containers = self.all
-        Score.containers = self.all
-        Lives.containers = self.all
-
-        self.player = Player()
+        self.all = BatchGroup()
+
+        # The simulation owns the game state, the scene only draws it
+        replayLog = ApplicationManager().replayLog
+        if self.simulation is None:
+            if replayLog is not None:
+                self.simulation = Simulation(seed=replayLog.seed, settings=replayLog.settings)
+            else:
+                self.simulation = Simulation()
+        if replayLog is not None:
+            self.replayInputs = replayLog.inputs()
+        elif ApplicationManager().recordPath is not None:
+            from replay import InputRecorder
+            self.recorder = InputRecorder(self.simulation.seed, self.simulation.settings)
+        self.simulation.group = self.all
+        self.simulation.initialize()
+        self.player = self.simulation.player
+
         self.score = Score()
         self.lives = Lives(self.player.lives)
         self.all.add(self.score)
         self.all.add(self.lives)
-        self.generate_enemies()
 
-    def handle_events(self, event):
+    def sample_input(self):
         keystate = pygame.key.get_pressed()
 
         # Player using LEFT & RIGHT ARROWS to move
-        direction = keystate[pygame.K_RIGHT] - keystate[pygame.K_LEFT]
-        self.player.set_direction(direction)
+        self.direction = keystate[pygame.K_RIGHT] - keystate[pygame.K_LEFT]
 
         # Player presses SPACE to shoot
-        self.player.firing = keystate[pygame.K_SPACE]
+        self.firing = bool(keystate[pygame.K_SPACE])
 
     def render(self, screen):
-        screen.blit(self.background, (0,0))
-        self.all.clear(screen, self.background)
-        self.all.update()
-        self.all.draw(screen)
+        self.score.set_score(self.simulation.score)
+        self.lives.set_lives(self.player.lives)
+        self.score.update()
+        self.lives.update()
+
+        if self.fullRedraw:
+            work.blits += 1
+            screen.blit(self.background, (0,0))
+        else:
+            # Only erase the areas that sprites covered on the last frame
+            self.all.clear(screen, self.background)
+
+        if self.alpha < 1.0:
+            moved = self.interpolate(self.alpha)
+            self.dirtyRects = self.all.draw(screen)
+            for (sprite, pos) in moved:
+                sprite.rect.topleft = pos
+        else:
+            self.dirtyRects = self.all.draw(screen)
+
+    def interpolate(self, alpha):
+        """
+        Move the sprites between their previous and current positions. The
+        moving sprites keep their position before the last update in previous.\n
+        Returns the (sprite, position) pairs to restore after drawing.
+        """
+        moved = []
+        for sprite in self.all.sprites():
+            old = getattr(sprite, "previous", None)
+            if old is None:
+                continue
+            (x, y) = sprite.rect.topleft
+            (dx, dy) = (x - old[0], y - old[1])
+            if (dx or dy) and abs(dx) + abs(dy) < const.SNAP_DISTANCE:
+                moved.append((sprite, (x, y)))
+                sprite.rect.topleft = (old[0] + round(dx * alpha), old[1] + round(dy * alpha))
+        return moved
+
+    def invalidate(self):
+        self.fullRedraw = True
+
+    def present(self):
+        """
+        Push the changed areas of the screen to the display.\n
+        Falls back to a full screen update on the first frame, or when the
+        dirty area covers more than DIRTY_RECT_THRESHOLD of the screen.
+        """
+        if not self.fullRedraw:
+            area = sum(rect.w * rect.h for rect in self.dirtyRects)
+            if area > SCREENRECT.w * SCREENRECT.h * const.DIRTY_RECT_THRESHOLD:
+                self.fullRedraw = True
+
+        if self.fullRedraw:
+            self.fullRedraw = False
+            update_display()
+        else:
+            update_display(self.dirtyRects)
 
     def update(self):
-        if self.player.alive():
-            self.player.move()
-
-            # Prevent overfiring/spamming lasers over max limit
-            if not self.player.reloading and self.player.firing and len(self.lasers) < const.MAX_SHOT:
-                Laser(self.player.gunpos())
-                Player.shootSound.play()
-            self.player.reloading = self.player.firing
-        else:
+        if self.replayInputs is not None:
+            tick = next(self.replayInputs, None)
+            if tick is None:
+                # The recording ended before the player lost (ex. the game was quit)
+                self.go_to_gameover()
+                return
+            (self.direction, self.firing) = tick
+        if self.recorder is not None:
+            self.recorder.record(self.direction, self.firing)
+
+        work.steps += 1
+        self.simulation.set_input(self.direction, self.firing)
+        self.simulation.step()
+
+        if self.simulation.shotFired:
+            AudioManager().play(self.player.shootSound)
+
+        if self.simulation.is_over():
             # Player has died (lost all lives)
             self.go_to_gameover()
 
-        # Enemy (group) direction change check
-        for e1 in self.aliens:
-            # An enemy reaches the edge of the screen,
-            # then change all enemy's direction
-            if e1.changeDirection:
-                for e2 in self.aliens:
-                    e2.go_down()
-                break
-
-        #===-------------------
-        # Collision detection
-        for alien in pygame.sprite.spritecollide(self.player, self.aliens, 1):
-            self.resetEnemy = True
-            self.player.died()
-            self.lives.set_lives(self.player.lives)
-            if self.player.lives <= 0:
-                self.player.kill()
-            break
-
-        for alien in pygame.sprite.groupcollide(self.lasers, self.aliens, 1, 1).keys():
-            self.score.increment()
-        #===-------------------
-
-        # Reset position of enemies
-        if self.resetEnemy:
-            self.resetEnemy = False
-            for e in self.aliens:
-                e.reset_position()
-
-        if len(self.aliens) == 0:
-            if self.speedFactor < const.MAX_SPEED_FACTOR:
-                self.speedFactor += 1
-            self.generate_enemies()
-
-        pygame.display.update()
-
-    def generate_enemies(self):
-        rows = random.randrange(2, 5)
-        cols = random.randrange(5, 11)
-        speed = random.randrange(const.MIN_E_SPEED + self.speedFactor, const.MAX_E_SPEED + self.speedFactor)
-        facing = random.choice((-1, 1))
-
-        count = 0
-        offset_x = offset_y = 16
-        x_pos = y_pos = 0
-
-        for row in range(rows):
-            for col in range(cols):
-                count = count + 1
-                e = Enemy(count, speed, facing)
-                e.set_position(x_pos, y_pos)
-                x_pos = 32 + x_pos + offset_x
-            x_pos = 0
-            y_pos = 32 + y_pos + offset_y
-
     def go_to_gameover(self):
-        ApplicationManager().load_scene(GameOverScene(self.score.get_score()))
-
-
-class GameOverScene(Scene):
+        # The simulation is closed with the scene, the last frame stays
+        # drawn until the game over screen is ready
+        self.save_recording()
+        if self.replayInputs is not None:
+            # Only replay the recording once, PLAY AGAIN starts a new game
+            ApplicationManager().replayLog = None
+            self.replayInputs = None
+        ApplicationManager().load_scene(GameOverScene(self.simulation.score))
+
+    def close(self):
+        self.save_recording()
+        self.simulation.close()
+
+    def save_recording(self):
+        "Write the recorded input of this game, if it is being recorded."
+        if self.recorder is not None:
+            path = ApplicationManager().next_record_path()
+            self.recorder.save(path)
+            print(f"Recorded {self.recorder.ticks} ticks to '{path}'")
+            self.recorder = None
+
+
+class GameOverScene(MenuScene):
+    images = ("background1.gif",)
+    fonts = (("courier new", 100), ("courier new", 50), ("courier", 50))
     def __init__(self, score=0):
         super(GameOverScene, self).__init__()
         self.id = 3
         self.sceneName = "gameover"
         self.score = score
+
+    def next_scenes(self):
+        return (GameScene,)
     
     def initialize(self):
         print(f"Initializing the '{self.sceneName}' level...")
@@ -265,29 +431,34 @@ class GameOverScene(Scene):
         self.quitBtn.actionFunc = self.__onQuitBtnClicked__
 
         self.background = load_image("background1.gif")
+        self.buttonLayer = ButtonLayer(self.againBtn, self.quitBtn)
 
         self.playAgain = False
         self.quitGame = False
 
-    def handle_events(self, event):
-        self.againBtn.handle_events()
-        self.quitBtn.handle_events()
+    def buttons(self):
+        return self.buttonLayer
+
+    def sample_input(self):
+        super(GameOverScene, self).sample_input()
 
         if self.playAgain:
             ApplicationManager().load_scene(GameScene())
 
-        if event.type == pygame.MOUSEBUTTONDOWN and self.quitGame:
+        if self.quitGame:
             ApplicationManager().running = False
 
     def render(self, screen):
-        screen.blit(self.background, (0, 0))
-        self.gameOverTxt.render(screen)
-        self.scoreTxt.render(screen)
-        self.againBtn.render(screen)
-        self.quitBtn.render(screen)
+        if self.fullRedraw:
+            work.blits += 1
+            screen.blit(self.background, (0, 0))
+            self.gameOverTxt.render(screen)
+            self.scoreTxt.render(screen)
+            self.buttonLayer.invalidate()
+        self.dirtyRects = self.buttonLayer.draw(screen, self.background)
 
     def update(self):
-        pygame.display.update()
+        pass
 
     def __onAgainBtnClicked__(self):
         self.playAgain = True
@@ -0,0 +1,290 @@
+#====================================================================
+# Name: simulation.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   The Simulation class contains the game rules of a single round
+#   (player, enemies, lasers, collisions and waves). It does not draw
+#   anything and can run without a display.
+#====================================================================
+import random
+
+import pygame
+
+import const
+from utils import load_image
+from gameobjects import Player, Enemy, Laser, SpritePool
+from collision import SpatialGroup, spritecollide, groupcollide, collide_mask
+
+# The constants that tune the difficulty, they can be changed per simulation
+SETTINGS = (
+    "MAX_SHOT", "MIN_E_SPEED", "MAX_E_SPEED", "MAX_SPEED_FACTOR",
+    "ENEMY_SPEED_LIMIT", "ENEMY_SPEED_STEP", "PIXEL_COLLISIONS",
+)
+
+
+def load_assets():
+    "Load the images the simulation needs to size and collide the sprites."
+    if Player.image is None:
+        Player.image = load_image("player.gif")
+    if Laser.image is None:
+        Laser.image = load_image("laser.gif")
+    if Enemy.image is None:
+        Enemy.image = load_image("spider.gif")
+
+    # The collision masks are shared by every sprite of a class
+    for cls in (Player, Laser, Enemy):
+        if cls.mask is None:
+            cls.mask = pygame.mask.from_surface(cls.image)
+
+
+class SpriteEntities():
+    """
+    Stores the enemies and lasers as individual pygame sprites.\n
+    @attr group [pygame.sprite.Group] - Extra group every sprite is added to\n
+    @attr aliens [SpatialGroup] - The enemies, indexed by a grid for collisions\n
+    @attr lasers [pygame.sprite.Group] - The lasers shot by the player\n
+    @attr collided [function] - Narrowphase of the sprites whose rects overlap, or None\n
+    @attr enemyPool [SpritePool] - Recycles the killed enemies, a new wave reuses them\n
+    @attr laserPool [SpritePool] - Recycles the lasers, a shot reuses them
+    """
+    def __init__(self, group, speedLimit=const.ENEMY_SPEED_LIMIT, speedStep=const.ENEMY_SPEED_STEP,
+                 pixelCollisions=const.PIXEL_COLLISIONS):
+        self.group = group
+        self.speedLimit = speedLimit
+        self.speedStep = speedStep
+        self.collided = collide_mask if pixelCollisions else None
+        self.lasers = pygame.sprite.Group()
+        self.aliens = SpatialGroup()
+        self.enemyPool = SpritePool(Enemy)
+        self.laserPool = SpritePool(Laser)
+
+    def bind_containers(self):
+        Laser.containers = self.lasers, self.group
+        Enemy.containers = self.aliens, self.group
+
+    def enemy_count(self):
+        return len(self.aliens)
+
+    def laser_count(self):
+        return len(self.lasers)
+
+    def spawn_wave(self, positions, speed, facing):
+        for (count, (x_pos, y_pos)) in enumerate(positions, 1):
+            e = self.enemyPool.acquire(count, speed, facing, self.speedLimit, self.speedStep)
+            e.set_position(x_pos, y_pos)
+
+    def fire(self, pos):
+        self.laserPool.acquire(pos)
+
+    def update(self):
+        self.aliens.update()
+        self.lasers.update()
+
+    def change_direction(self):
+        # An enemy reaches the edge of the screen,
+        # then change all enemy's direction
+        for e1 in self.aliens:
+            if e1.changeDirection:
+                for e2 in self.aliens:
+                    e2.go_down()
+                break
+
+        # Every enemy has moved for this step
+        self.aliens.moved()
+
+    def collide_player(self, player):
+        "Kill the enemies touching the player. Returns True if any were hit."
+        self.aliens.index(1)
+        return len(spritecollide(player, self.aliens, 1, self.collided)) > 0
+
+    def collide_lasers(self):
+        "Kill the lasers and enemies that overlap. Returns the number of lasers that hit."
+        self.aliens.index(len(self.lasers))
+        return len(groupcollide(self.lasers, self.aliens, 1, 1, self.collided))
+
+    def reset_positions(self):
+        for e in self.aliens:
+            e.reset_position()
+
+    def sync(self):
+        pass
+
+    def clear(self):
+        "Kill every enemy and laser, so the pooled sprites can be reused."
+        for sprite in self.aliens.sprites() + self.lasers.sprites():
+            sprite.kill()
+
+    def positions(self):
+        "Returns the (x, y) positions of the enemies."
+        return [e.rect.topleft for e in self.aliens]
+
+    def laser_positions(self):
+        "Returns the (x, y) positions of the lasers."
+        return [l.rect.topleft for l in self.lasers]
+
+    def pool_stats(self):
+        "Returns the counters of the sprite pools, by class name."
+        return {"Enemy": self.enemyPool.stats(), "Laser": self.laserPool.stats()}
+
+
+class Simulation():
+    """
+    The Simulation class steps the state of a single round of the game.\n
+    @attr group [pygame.sprite.Group] - Extra group every sprite is added to (ex. a render group)\n
+    @attr backend [str] - The entity storage, "sprite" or "numpy"\n
+    @attr seed [int] - The seed of the random numbers of this game\n
+    @attr settings [dict] - The difficulty constants (see SETTINGS) used by this game\n
+    @attr score [int] - The number of enemies destroyed\n
+    @attr ticks [int] - The number of steps simulated\n
+    @attr wavesCleared [int] - The number of waves destroyed\n
+    @attr waveSize [tuple] - Fixed (rows, columns) of every wave, or None for a random size\n
+    @attr shotFired [bool] - True if the player fired a laser during the last step
+    """
+    def __init__(self, group=None, backend=None, seed=None, settings=None):
+        self.group = group
+        self.backend = backend or const.ENTITY_BACKEND
+
+        self.settings = dict((name, getattr(const, name)) for name in SETTINGS)
+        if settings is not None:
+            for (name, value) in settings.items():
+                if name not in self.settings:
+                    raise KeyError("Unknown setting '%s'" % name)
+                self.settings[name] = value
+
+        # Every game has its own generator, so a game can be reproduced
+        # from its seed and input
+        self.seed = seed
+        if self.seed is None:
+            self.seed = random.randrange(2**32)
+        self.random = random.Random(self.seed)
+
+        self.speedFactor = 0
+        self.resetEnemy = False
+        self.score = 0
+        self.ticks = 0
+        self.wavesCleared = 0
+        self.shotFired = False
+        self.waveSize = None
+
+    def initialize(self):
+        load_assets()
+
+        drawn = self.group is not None
+        if not drawn:
+            self.group = pygame.sprite.Group()
+
+        limit = self.settings["ENEMY_SPEED_LIMIT"]
+        step = self.settings["ENEMY_SPEED_STEP"]
+        pixels = bool(self.settings["PIXEL_COLLISIONS"])
+        if self.backend == "numpy":
+            from swarm import Swarm
+            # Only build sprite views when someone draws the simulation
+            self.entities = Swarm(self.group, drawn, limit, step, pixels)
+        else:
+            self.entities = SpriteEntities(self.group, limit, step, pixels)
+            # Create the sprites of the largest wave up front, not during the first frames
+            self.entities.enemyPool.reserve(const.MAX_E_ROW * const.MAX_E_COL)
+            self.entities.laserPool.reserve(self.settings["MAX_SHOT"])
+        self.bind_containers()
+
+        self.player = Player()
+        self.generate_enemies()
+
+    def bind_containers(self):
+        """
+        Assign the sprite groups of this simulation to the sprite classes.\n
+        The containers are class attributes, so they are bound again before
+        each step in case several simulations share the process.
+        """
+        self.entities.bind_containers()
+        Player.containers = self.group
+
+    def set_input(self, direction, firing):
+        """
+        Set the player input for the next step.\n
+        @param direction [int] - The direction to move (-1, 0, 1)\n
+        @param firing [bool] - True if the player is shooting
+        """
+        self.player.set_direction(direction)
+        self.player.set_firing(firing)
+
+    def step(self):
+        "Advance the game by a single tick."
+        self.bind_containers()
+        self.ticks += 1
+        self.shotFired = False
+
+        self.entities.update()
+
+        if self.player.alive():
+            self.player.move()
+
+            # Prevent overfiring/spamming lasers over max limit
+            if not self.player.reloading and self.player.firing and self.entities.laser_count() < self.settings["MAX_SHOT"]:
+                self.entities.fire(self.player.gunpos())
+                self.shotFired = True
+            self.player.reloading = self.player.firing
+
+        # Enemy (group) direction change check
+        self.entities.change_direction()
+
+        #===-------------------
+        # Collision detection
+        if not self.is_over() and self.entities.collide_player(self.player):
+            self.resetEnemy = True
+            self.player.died()
+            if self.player.lives <= 0:
+                self.player.kill()
+
+        self.score += self.entities.collide_lasers()
+        #===-------------------
+
+        # Reset position of enemies
+        if self.resetEnemy:
+            self.resetEnemy = False
+            self.entities.reset_positions()
+
+        if self.entities.enemy_count() == 0:
+            self.wavesCleared += 1
+            if self.speedFactor < self.settings["MAX_SPEED_FACTOR"]:
+                self.speedFactor += 1
+            self.generate_enemies()
+
+        self.entities.sync()
+
+    def close(self):
+        "Release the sprites of this game, once it is no longer played or drawn."
+        self.entities.clear()
+        self.player.kill()
+
+    def pool_stats(self):
+        "Returns the counters of the sprite pools by class name, empty if the backend has none."
+        stats = getattr(self.entities, "pool_stats", None)
+        return stats() if stats is not None else {}
+
+    def is_over(self):
+        "Returns True once the player has lost all lives."
+        return self.player.lives <= 0
+
+    def generate_enemies(self):
+        rows = self.random.randrange(2, const.MAX_E_ROW + 1)
+        cols = self.random.randrange(5, const.MAX_E_COL + 1)
+        if self.waveSize is not None:
+            (rows, cols) = self.waveSize
+        speed = self.random.randrange(self.settings["MIN_E_SPEED"] + self.speedFactor,
+                                      self.settings["MAX_E_SPEED"] + self.speedFactor)
+        facing = self.random.choice((-1, 1))
+
+        positions = []
+        offset_x = offset_y = 16
+        x_pos = y_pos = 0
+
+        for row in range(rows):
+            for col in range(cols):
+                positions.append((x_pos, y_pos))
+                x_pos = 32 + x_pos + offset_x
+            x_pos = 0
+            y_pos = 32 + y_pos + offset_y
+
+        self.entities.spawn_wave(positions, speed, facing)
@@ -0,0 +1,263 @@
+#====================================================================
+# Name: swarm.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Optional NumPy backend for the simulation. The enemies and lasers
+#   are stored as arrays (struct-of-arrays) and moved, dropped down
+#   and collided in vectorized steps. Sprites are only thin views
+#   used to draw the arrays.
+#====================================================================
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import pygame
+
+from const import SCREENRECT, ENEMY_SPEED_LIMIT, ENEMY_SPEED_STEP, PIXEL_COLLISIONS
+from gameobjects import Player, Enemy, Laser
+from counters import work
+
+
+class EntityView(pygame.sprite.Sprite):
+    """
+    A sprite that only mirrors one entry of a Swarm so it can be drawn.\n
+    @attr previous [tuple] - The position before the last sync, None for a new view
+    """
+    def __init__(self, image, x, y, *groups):
+        self.previous = None
+        self.image = image
+        self.rect = image.get_rect(topleft=(x, y))
+        pygame.sprite.Sprite.__init__(self, *groups)
+
+
+class Swarm():
+    """
+    Stores the enemies and lasers as NumPy arrays.\n
+    @attr group [pygame.sprite.Group] - Group the sprite views are added to\n
+    @attr views [bool] - True to keep a sprite view per enemy and laser for drawing\n
+    @attr speedLimit [int] - Speed the enemies reach after enough resets\n
+    @attr speedStep [int] - Speed the enemies gain on every reset\n
+    @attr pixelCollisions [bool] - True to test the pixels of the entities whose rects overlap
+    """
+    def __init__(self, group, views=True, speedLimit=ENEMY_SPEED_LIMIT, speedStep=ENEMY_SPEED_STEP,
+                 pixelCollisions=PIXEL_COLLISIONS):
+        if numpy is None:
+            raise ImportError("The 'numpy' entity backend requires the numpy package")
+
+        self.group = group
+        self.views = views
+        self.speedLimit = speedLimit
+        self.speedStep = speedStep
+        self.pixelCollisions = pixelCollisions
+
+        (self.e_w, self.e_h) = Enemy.image.get_size()
+        (self.l_w, self.l_h) = Laser.image.get_size()
+        self.laserSpeed = -9
+
+        # Enemies
+        self.ex = numpy.zeros(0, dtype=numpy.int32)
+        self.ey = numpy.zeros(0, dtype=numpy.int32)
+        self.speed = numpy.zeros(0, dtype=numpy.int32)
+        self.facing = numpy.zeros(0, dtype=numpy.int32)
+        self.startingX = numpy.zeros(0, dtype=numpy.int32)
+        self.startingY = numpy.zeros(0, dtype=numpy.int32)
+        self.startingDir = numpy.zeros(0, dtype=numpy.int32)
+        self.changeDirection = numpy.zeros(0, dtype=bool)
+        self.alive = numpy.zeros(0, dtype=bool)
+        self.enemyViews = []
+
+        # Lasers
+        self.lx = numpy.zeros(0, dtype=numpy.int32)
+        self.ly = numpy.zeros(0, dtype=numpy.int32)
+        self.laserAlive = numpy.zeros(0, dtype=bool)
+        self.laserViews = []
+
+    def bind_containers(self):
+        pass
+
+    def enemy_count(self):
+        return int(numpy.count_nonzero(self.alive))
+
+    def laser_count(self):
+        return int(numpy.count_nonzero(self.laserAlive))
+
+    def spawn_wave(self, positions, speed, facing):
+        self.__compact_enemies()
+
+        count = len(positions)
+        work.spritesCreated += count
+        (x, y) = numpy.array(positions, dtype=numpy.int32).reshape(count, 2).T
+        self.startingX = numpy.concatenate((self.startingX, x))
+        self.startingY = numpy.concatenate((self.startingY, y))
+        self.startingDir = numpy.concatenate((self.startingDir, numpy.full(count, facing, numpy.int32)))
+        self.speed = numpy.concatenate((self.speed, numpy.full(count, speed, numpy.int32)))
+        self.facing = numpy.concatenate((self.facing, numpy.full(count, facing, numpy.int32)))
+        self.changeDirection = numpy.concatenate((self.changeDirection, numpy.zeros(count, bool)))
+        self.alive = numpy.concatenate((self.alive, numpy.ones(count, bool)))
+
+        # Enemies facing LEFT start from the right side of the screen
+        if facing < 0:
+            x = SCREENRECT.right - x - self.e_w
+        self.ex = numpy.concatenate((self.ex, x))
+        self.ey = numpy.concatenate((self.ey, y))
+
+        if self.views:
+            for (x_pos, y_pos) in zip(x.tolist(), y.tolist()):
+                self.enemyViews.append(EntityView(Enemy.image, x_pos, y_pos, self.group))
+
+    def fire(self, pos):
+        x = pos[0] - self.l_w // 2
+        y = pos[1] - self.l_h
+        work.spritesCreated += 1
+        self.lx = numpy.append(self.lx, numpy.int32(x))
+        self.ly = numpy.append(self.ly, numpy.int32(y))
+        self.laserAlive = numpy.append(self.laserAlive, True)
+
+        if self.views:
+            self.laserViews.append(EntityView(Laser.image, x, y, self.group))
+
+    def update(self):
+        # Move every enemy and check which ones left the screen
+        self.ex += self.facing * self.speed
+        self.changeDirection = ((self.ex < SCREENRECT.left) | (self.ey < SCREENRECT.top) |
+                                (self.ex + self.e_w > SCREENRECT.right) |
+                                (self.ey + self.e_h > SCREENRECT.bottom))
+
+        # Move the lasers, remove the ones past the screen
+        self.ly += self.laserSpeed
+        self.laserAlive &= self.ly > 0
+        self.__compact_lasers()
+
+    def change_direction(self):
+        if not numpy.any(self.changeDirection & self.alive):
+            return
+
+        # Calculate the remaining pixels outside the screen
+        pixels = numpy.where(self.facing > 0, self.ex + self.e_w - SCREENRECT.width,
+                             numpy.where(self.facing < 0, self.ex - SCREENRECT.x, 0))
+
+        self.facing = -self.facing
+        self.ey += self.e_h + 1
+        numpy.clip(self.ex, SCREENRECT.left, SCREENRECT.right - self.e_w, out=self.ex)
+        numpy.clip(self.ey, SCREENRECT.top, SCREENRECT.bottom - self.e_h, out=self.ey)
+
+        # Shift the sprites closest to the screen edge to keep them equidistant
+        left = self.changeDirection & (self.facing < 0)
+        right = self.changeDirection & (self.facing > 0)
+        self.ex = numpy.where(left, SCREENRECT.right + pixels - self.e_w, self.ex)
+        self.ex = numpy.where(right, self.ex + pixels, self.ex).astype(numpy.int32)
+
+    def collide_player(self, player):
+        hit = self.alive & self.__overlap(self.ex, self.ey, self.e_w, self.e_h, player.rect)
+        work.collisionPairs += int(numpy.count_nonzero(hit))
+        if self.pixelCollisions:
+            self.__touching(hit, Player.mask, player.rect.x, player.rect.y)
+        self.alive &= ~hit
+        return bool(numpy.any(hit))
+
+    def collide_lasers(self):
+        if len(self.lx) == 0 or not numpy.any(self.alive):
+            return 0
+
+        # Overlap matrix of every laser (rows) against every enemy (columns)
+        overlap = ((self.lx[:, None] < self.ex + self.e_w) & (self.ex < self.lx[:, None] + self.l_w) &
+                   (self.ly[:, None] < self.ey + self.e_h) & (self.ey < self.ly[:, None] + self.l_h))
+        overlap &= self.alive
+        overlap &= self.laserAlive[:, None]
+
+        hits = 0
+        # Resolve in laser order, an enemy can only be destroyed once
+        for l in numpy.flatnonzero(overlap.any(axis=1)):
+            victims = overlap[l] & self.alive
+            work.collisionPairs += int(numpy.count_nonzero(victims))
+            if self.pixelCollisions:
+                self.__touching(victims, Laser.mask, self.lx[l], self.ly[l])
+            if victims.any():
+                self.alive &= ~victims
+                self.laserAlive[l] = False
+                hits += 1
+
+        self.__compact_lasers()
+        return hits
+
+    def reset_positions(self):
+        self.speed = numpy.where(self.speed < self.speedLimit,
+                                 numpy.minimum(self.speed + self.speedStep, self.speedLimit),
+                                 self.speed).astype(numpy.int32)
+        self.ey = self.startingY.copy()
+        flipped = (self.facing < 0) | (self.startingDir < 0)
+        self.ex = numpy.where(flipped, SCREENRECT.right - self.startingX - self.e_w, self.startingX).astype(numpy.int32)
+
+    def sync(self):
+        "Copy the array positions to the sprite views."
+        if not self.views:
+            return
+
+        for (view, x, y, alive) in zip(self.enemyViews, self.ex.tolist(), self.ey.tolist(), self.alive.tolist()):
+            if alive:
+                view.previous = view.rect.topleft
+                view.rect.topleft = (x, y)
+            elif view.alive():
+                view.kill()
+
+        for (view, x, y) in zip(self.laserViews, self.lx.tolist(), self.ly.tolist()):
+            view.previous = view.rect.topleft
+            view.rect.topleft = (x, y)
+
+    def clear(self):
+        "Remove every enemy and laser."
+        self.alive[:] = False
+        self.laserAlive[:] = False
+        self.__compact_enemies()
+        self.__compact_lasers()
+
+    def positions(self):
+        "Returns the (x, y) positions of the enemies that are alive."
+        return numpy.stack((self.ex[self.alive], self.ey[self.alive]), axis=1)
+
+    def laser_positions(self):
+        "Returns the (x, y) positions of the lasers that are alive."
+        return numpy.stack((self.lx[self.laserAlive], self.ly[self.laserAlive]), axis=1)
+
+    def __touching(self, hit, mask, x, y):
+        "Clear the enemies of hit whose pixels do not overlap the mask at (x, y)."
+        x = int(x)
+        y = int(y)
+        for e in numpy.flatnonzero(hit).tolist():
+            if mask.overlap(Enemy.mask, (int(self.ex[e]) - x, int(self.ey[e]) - y)) is None:
+                hit[e] = False
+
+    def __overlap(self, x, y, w, h, rect):
+        return (x < rect.right) & (rect.x < x + w) & (y < rect.bottom) & (rect.y < y + h)
+
+    def __compact_enemies(self):
+        "Drop the enemies that are no longer alive."
+        keep = self.alive
+        if keep.all():
+            return
+        work.spritesKilled += len(keep) - int(numpy.count_nonzero(keep))
+        for name in ("ex", "ey", "speed", "facing", "startingX", "startingY",
+                     "startingDir", "changeDirection", "alive"):
+            setattr(self, name, getattr(self, name)[keep])
+        if self.views:
+            for (view, alive) in zip(self.enemyViews, keep.tolist()):
+                if not alive:
+                    view.kill()
+            self.enemyViews = [view for (view, alive) in zip(self.enemyViews, keep.tolist()) if alive]
+
+    def __compact_lasers(self):
+        "Drop the lasers that are no longer alive."
+        keep = self.laserAlive
+        if keep.all():
+            return
+        work.spritesKilled += len(keep) - int(numpy.count_nonzero(keep))
+        if self.views:
+            for (view, alive) in zip(self.laserViews, keep.tolist()):
+                if not alive:
+                    view.kill()
+            self.laserViews = [view for (view, alive) in zip(self.laserViews, keep.tolist()) if alive]
+        self.lx = self.lx[keep]
+        self.ly = self.ly[keep]
+        self.laserAlive = self.laserAlive[keep]
@@ -0,0 +1,15 @@
+#====================================================================
+# Name: tests/conftest.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Runs the tests without a window or an audio device, and makes the
+#   game modules at the root of the repository importable.
+#====================================================================
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
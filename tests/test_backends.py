@@ -0,0 +1,55 @@
+#====================================================================
+# Name: tests/test_backends.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Tests that the "sprite" and "numpy" entity backends play the same
+#   game: with the same seed and input, the score, the lives and the
+#   enemy positions match on every tick.
+#====================================================================
+import importlib.util
+import random
+
+import pytest
+
+from simulation import Simulation
+
+pytestmark = pytest.mark.skipif(importlib.util.find_spec("numpy") is None,
+                                reason="the numpy backend requires numpy")
+
+
+def scripted_input(seed):
+    "Yields a random (direction, firing) input per tick, the same for every backend."
+    rng = random.Random(seed)
+    while True:
+        yield (rng.choice((-1, 0, 1)), rng.random() < 0.5)
+
+
+def trace(backend, seed, settings, ticks=3000):
+    "Returns the (score, lives, enemy positions) of every tick of a game."
+    simulation = Simulation(backend=backend, seed=seed, settings=settings)
+    simulation.initialize()
+    states = []
+    for (direction, firing) in scripted_input(seed):
+        if simulation.ticks >= ticks or simulation.is_over():
+            break
+        simulation.set_input(direction, firing)
+        simulation.step()
+        positions = sorted(tuple(int(value) for value in pos) for pos in simulation.entities.positions())
+        states.append((simulation.score, simulation.player.lives, positions))
+    simulation.close()
+    return states
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("settings", (
+    {},
+    {"PIXEL_COLLISIONS": 1},
+    {"MAX_SHOT": 8},
+))
+def test_backends_play_the_same_game(seed, settings):
+    sprite = trace("sprite", seed, settings)
+    numpy = trace("numpy", seed, settings)
+    assert len(sprite) == len(numpy)
+    for (tick, (expected, actual)) in enumerate(zip(sprite, numpy), 1):
+        assert actual == expected, "tick %d" % tick
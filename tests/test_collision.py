@@ -0,0 +1,121 @@
+#====================================================================
+# Name: tests/test_collision.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Tests the pixel collisions of sprites whose rects overlap: a laser
+#   or the player touching only the transparent corner of an enemy is
+#   not a hit with PIXEL_COLLISIONS, and is one without it, in both
+#   entity backends.
+#====================================================================
+import importlib.util
+
+import pygame
+import pytest
+
+from collision import collide_mask
+from gameobjects import Player, Enemy, Laser
+from simulation import Simulation, load_assets
+
+BACKENDS = ("sprite", pytest.param("numpy", marks=pytest.mark.skipif(
+    importlib.util.find_spec("numpy") is None, reason="the numpy backend requires numpy")))
+
+# Top left of the enemy in every test, away from the screen edges
+ENEMY_POS = (200, 200)
+
+
+def offsets(cls, touching):
+    """
+    Returns the (x, y) offsets from the enemy to a sprite of cls where
+    their rects overlap, and their pixels touch or not.
+    """
+    (width, height) = cls.image.get_size()
+    (enemyWidth, enemyHeight) = Enemy.image.get_size()
+    found = []
+    for y in range(1 - height, enemyHeight):
+        for x in range(1 - width, enemyWidth):
+            if (Enemy.mask.overlap(cls.mask, (x, y)) is not None) == touching:
+                found.append((x, y))
+    return found
+
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, cls, pos):
+        pygame.sprite.Sprite.__init__(self)
+        self.rect = cls.image.get_rect(topleft=pos)
+        self.mask = cls.mask
+
+
+@pytest.fixture(scope="module", autouse=True)
+def assets():
+    load_assets()
+
+
+def game(backend, pixels):
+    "Returns a simulation with a single still enemy at ENEMY_POS."
+    simulation = Simulation(backend=backend, seed=0, settings={"PIXEL_COLLISIONS": pixels})
+    simulation.initialize()
+    simulation.entities.clear()
+    simulation.entities.spawn_wave([ENEMY_POS], 0, 1)
+    simulation.entities.sync()
+    return simulation
+
+
+def fire_at(simulation, offset):
+    "Fire a laser whose top left is offset from the enemy."
+    (width, height) = Laser.image.get_size()
+    x = ENEMY_POS[0] + offset[0]
+    y = ENEMY_POS[1] + offset[1]
+    simulation.entities.fire((x + width // 2, y + height))
+
+
+def test_masks_have_transparent_corners():
+    assert offsets(Laser, touching=False)
+    assert offsets(Player, touching=False)
+
+
+@pytest.mark.parametrize("cls", (Laser, Player))
+def test_collide_mask(cls):
+    enemy = Box(Enemy, ENEMY_POS)
+    for (touching, expected) in ((False, False), (True, True)):
+        (x, y) = offsets(cls, touching)[0]
+        other = Box(cls, (ENEMY_POS[0] + x, ENEMY_POS[1] + y))
+        assert enemy.rect.colliderect(other.rect)
+        assert collide_mask(enemy, other) is expected
+        assert collide_mask(other, enemy) is expected
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("pixels", (True, False))
+def test_laser_on_transparent_corner(backend, pixels):
+    for offset in offsets(Laser, touching=False)[::17]:
+        simulation = game(backend, pixels)
+        fire_at(simulation, offset)
+        hits = simulation.entities.collide_lasers()
+        # Only the rects count without pixel collisions
+        assert hits == (0 if pixels else 1), offset
+        assert simulation.entities.enemy_count() == (1 if pixels else 0)
+        simulation.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("pixels", (True, False))
+def test_laser_on_pixels(backend, pixels):
+    for offset in offsets(Laser, touching=True)[::37]:
+        simulation = game(backend, pixels)
+        fire_at(simulation, offset)
+        assert simulation.entities.collide_lasers() == 1, offset
+        assert simulation.entities.enemy_count() == 0
+        simulation.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("pixels", (True, False))
+@pytest.mark.parametrize("touching", (True, False))
+def test_player_touching_enemy(backend, pixels, touching):
+    for (x, y) in offsets(Player, touching)[::97]:
+        simulation = game(backend, pixels)
+        simulation.player.rect.topleft = (ENEMY_POS[0] + x, ENEMY_POS[1] + y)
+        hit = simulation.entities.collide_player(simulation.player)
+        assert hit is (touching or not pixels), (x, y)
+        simulation.close()
@@ -0,0 +1,102 @@
+#====================================================================
+# Name: tests/test_replay.py
+# Created on: Oct 18, 2026
+#
+# Description:
+#   Tests that a recorded game loads back with the same settings and
+#   input on every tick and replays to the same end, and that a damaged
+#   replay file is rejected with a ValueError.
+#====================================================================
+import random
+
+import pytest
+
+from replay import InputRecorder, InputLog, HEADER, run_headless
+from simulation import Simulation
+
+
+def recorded_input(seed, ticks):
+    "Returns a random (direction, firing) input per tick, with long runs."
+    rng = random.Random(seed)
+    inputs = []
+    while len(inputs) < ticks:
+        tick = (rng.choice((-1, 0, 1)), rng.random() < 0.5)
+        inputs.extend([tick] * rng.choice((1, 3, 200)))
+    return inputs[:ticks]
+
+
+def save(tmp_path, inputs):
+    "Records the inputs and returns the path of the saved replay."
+    recorder = InputRecorder(1234)
+    for (direction, firing) in inputs:
+        recorder.record(direction, firing)
+    path = tmp_path / "game.replay"
+    recorder.save(path)
+    return path
+
+
+@pytest.mark.parametrize("ticks", (1, 128, 5000))
+def test_round_trip(tmp_path, ticks):
+    inputs = recorded_input(ticks, ticks)
+    log = InputLog(save(tmp_path, inputs))
+    assert log.seed == 1234
+    assert log.ticks == ticks
+    assert list(log.inputs()) == inputs
+
+
+def test_single_run_longer_than_one_varint_byte(tmp_path):
+    inputs = [(1, True)] * 300
+    log = InputLog(save(tmp_path, inputs))
+    assert log.runs == [(log.runs[0][0], 300)]
+    assert list(log.inputs()) == inputs
+
+
+def test_settings_round_trip(tmp_path):
+    recorder = InputRecorder(1234, {"MAX_SHOT": 8, "PIXEL_COLLISIONS": True})
+    recorder.record(0, False)
+    path = tmp_path / "game.replay"
+    recorder.save(path)
+    assert InputLog(path).settings == {"MAX_SHOT": 8, "PIXEL_COLLISIONS": 1}
+
+
+@pytest.mark.parametrize("settings", ({}, {"MAX_SHOT": 8, "PIXEL_COLLISIONS": True}))
+def test_replay_reproduces_the_game(tmp_path, settings):
+    simulation = Simulation(backend="sprite", seed=7, settings=settings)
+    simulation.initialize()
+    recorder = InputRecorder(simulation.seed, simulation.settings)
+    for (direction, firing) in recorded_input(7, 2000):
+        if simulation.is_over():
+            break
+        recorder.record(direction, firing)
+        simulation.set_input(direction, firing)
+        simulation.step()
+    path = tmp_path / "game.replay"
+    recorder.save(path)
+
+    (replayed, seconds) = run_headless(path, backend="sprite")
+    assert replayed.settings == simulation.settings
+    assert (replayed.ticks, replayed.score, replayed.player.lives) == \
+        (simulation.ticks, simulation.score, simulation.player.lives)
+
+
+def test_cut_short(tmp_path):
+    path = save(tmp_path, [(1, True)] * 300)
+    # Drop the last byte of the two byte run length
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        InputLog(path)
+
+
+def test_ticks_do_not_match_runs(tmp_path):
+    path = save(tmp_path, [(0, False)] * 10 + [(-1, False)] * 10)
+    # Drop the whole last run
+    path.write_bytes(path.read_bytes()[:-2])
+    with pytest.raises(ValueError):
+        InputLog(path)
+
+
+def test_not_a_replay(tmp_path):
+    path = tmp_path / "game.replay"
+    path.write_bytes(b"\0" * HEADER.size)
+    with pytest.raises(ValueError):
+        InputLog(path)
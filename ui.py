@@ -10,6 +10,8 @@
 from enum import Enum
 import pygame
 import colour
+from utils import load_font, render_text
+from counters import COUNTERS, work
 
 class Justify(Enum):
     LEFT = 0
@@ -32,7 +34,7 @@ class Text():
         self.text = text
         self.x = x
         self.y = y
-        self.font = pygame.font.SysFont(fonttype, fontsize)
+        self.font = load_font(fonttype, fontsize)
         self.rerender = False
 
         self.foreColour = colour
@@ -60,22 +62,26 @@ class Text():
         if self.justified == Justify.RIGHT:
             pos_x = self.x - textRect.right
 
+        work.blits += 1
         screen.blit(self.surface, (pos_x, self.y))
 
     def __render_font__(self, text):
         "Wrapper function around font.render() -> Surface"
         self.rerender = False
-        return self.font.render(text, False, self.foreColour)
+        return render_text(self.font, text, self.foreColour)
 
 
 class Button():
     """
     Create a pygame button.\n
+    The inactive, active (hovered) and pressed looks are composed once, and
+    drawing the button is a single blit of the look of its current state.\n
     @attr x [int] - The x-position\n
     @attr y [int] - The y-position\n
     @attr width [int] - The width of the button\n
     @attr height [int] - The height of the button\n
-    @attr text [int] - The text to display inside the button
+    @attr text [int] - The text to display inside the button\n
+    @attr state [str] - The look of the button, "inactive", "active" or "pressed"
     """
     def __init__(self, x, y, width, height, text=""):
         self.text = text
@@ -85,7 +91,7 @@ class Button():
         self.w = width
         self.h = height
 
-        self.font = pygame.font.SysFont("courier", 50)
+        self.font = load_font("courier", 50)
 
         self.activeColour = colour.GREY        # Button is active
         self.inactiveColour = colour.WHITE     # Button is inactive
@@ -95,6 +101,8 @@ class Button():
         self.backColour = colour.BLACK
 
         self.hasPressed = False
+        self.state = "inactive"
+        self.looks = None       # state -> Surface, composed on the first render
 
     def set_position(self, x, y):
         """
@@ -102,9 +110,11 @@ class Button():
         @param rect [pygame.Rect]
         """
         self.pos = pygame.Rect(x, y, 0, 0)
+        self.looks = None
 
     def set_text(self, newText):
         self.text = newText
+        self.looks = None
 
     def set_button_colour(self, active, inactive=None, pressed=None):
         "Set the colour of the button when active, inactive, and pressed."
@@ -112,17 +122,27 @@ class Button():
         self.inactiveColour = inactive
         if pressed is not None:
             self.pressedColour = pressed
+        self.looks = None
 
     def set_font_colour(self, fore, back):
         "Set the colour of the font. Takes in a foreground and background colour (R,G,B)."
         self.foreColour = fore
         self.backColour = back
+        self.looks = None
 
-    def handle_events(self):
-        mouse = pygame.mouse.get_pos()
-        click = pygame.mouse.get_pressed()
+    def handle_events(self, mouse=None, click=None):
+        """
+        Press the button when clicked, and update its state.\n
+        @param mouse [tuple] - The mouse position, polled when None\n
+        @param click [tuple] - The mouse button states, polled when None
+        """
+        if mouse is None:
+            mouse = pygame.mouse.get_pos()
+        if click is None:
+            click = pygame.mouse.get_pressed()
 
         if self.pos.collidepoint(mouse[0], mouse[1]):
+            self.state = "pressed" if click[0] == 1 else "active"
             if click[0] == 1 and self.hasPressed is False:
                 self.hasPressed = True
 
@@ -132,35 +152,175 @@ class Button():
             elif click[0] == 0 and self.hasPressed:
                 # Prevent accidental second mouse click
                 self.hasPressed = False
+        else:
+            self.state = "inactive"
 
-    def render(self, screen):
-        mouse = pygame.mouse.get_pos()
-        click = pygame.mouse.get_pressed()        
+    def press(self, pos):
+        "Press the button and perform its action if pos is on it (mouse button down)."
+        if self.pos.collidepoint(pos):
+            self.hasPressed = True
+            self.state = "pressed"
+            if self.actionFunc != None:
+                self.actionFunc()
 
-        if self.pos.collidepoint(mouse[0], mouse[1]):
-            # Button is active
-            if self.activeColour is not None:
-                pygame.draw.rect(screen, self.activeColour, self.pos)
-
-            if click[0] == 1:
-                # Button is pressed
-                if self.pressedColour is not None:
-                    pygame.draw.rect(screen, self.pressedColour, self.pos)
+    def release(self, pos):
+        "Release the button (mouse button up)."
+        self.hasPressed = False
+        self.hover(pos)
+
+    def hover(self, pos):
+        "Update the state of the button from the mouse position."
+        if self.pos.collidepoint(pos):
+            self.state = "pressed" if self.hasPressed else "active"
         else:
-            # Button is inactive
-            if self.inactiveColour is not None:
-                pygame.draw.rect(screen, self.inactiveColour, self.pos)
-         
-        surface = self.__renderFont(self.text)
-        textRect = surface.get_rect()
-        textRect.center = (self.x + (self.w/2), self.y + (self.h/2))
-        
-        screen.blit(surface, textRect)
+            self.state = "inactive"
+
+    def render(self, screen):
+        "Draw the look of the current state. Returns the rect drawn."
+        if self.looks is None:
+            self.looks = self.__compose()
+        work.blits += 1
+        return screen.blit(self.looks[self.state], (self.x, self.y))
+
+    def __compose(self):
+        "Returns the look of every state, the label drawn over the state colour."
+        label = self.__renderFont(self.text)
+        labelRect = label.get_rect(center=(self.w / 2, self.h / 2))
+        # Without a pressed colour, a pressed button looks active
+        pressed = self.pressedColour if self.pressedColour is not None else self.activeColour
+
+        looks = {}
+        for (state, fill) in (("inactive", self.inactiveColour), ("active", self.activeColour), ("pressed", pressed)):
+            if fill is None:
+                surface = pygame.Surface((self.w, self.h), pygame.SRCALPHA)
+            else:
+                surface = pygame.Surface((self.w, self.h))
+                surface.fill(fill)
+            surface.blit(label, labelRect)
+            if pygame.display.get_surface() is not None:
+                surface = surface.convert() if fill is not None else surface.convert_alpha()
+            looks[state] = surface
+        return looks
 
     def __renderFont(self, text, highlight=None):
         "Wrapper function around font.render() -> Surface"
-        return self.font.render(text, False, self.foreColour)        
+        return render_text(self.font, text, self.foreColour)        
 
     def actionFunc(self): 
         "Event handler function to handle on_click events."
-        pass
\ No newline at end of file
+        pass
+
+
+class ButtonLayer():
+    """
+    Draws a set of buttons, and only redraws the ones whose state changed
+    (hovered, pressed or released) since the last frame.\n
+    @attr buttons [list] - The buttons of the layer\n
+    @attr dirty [list] - The buttons to draw on the next frame
+    """
+    def __init__(self, *buttons):
+        self.buttons = list(buttons)
+        self.states = [None] * len(self.buttons)
+        self.dirty = list(self.buttons)
+
+    def invalidate(self):
+        "Draw every button on the next frame."
+        self.dirty = list(self.buttons)
+
+    def update(self):
+        "Mark the buttons whose state changed as dirty."
+        for (i, button) in enumerate(self.buttons):
+            if button.state != self.states[i]:
+                self.states[i] = button.state
+                if button not in self.dirty:
+                    self.dirty.append(button)
+
+    def draw(self, screen, background):
+        """
+        Draw the dirty buttons over the background.\n
+        Returns the rects that changed.
+        """
+        self.update()
+        rects = []
+        for button in self.dirty:
+            area = pygame.Rect(button.x, button.y, button.w, button.h)
+            work.blits += 1
+            screen.blit(background, area, area)
+            button.render(screen)
+            rects.append(area)
+        self.dirty = []
+        return rects
+
+class FrameOverlay():
+    """
+    Draws a frame time graph and the average time of each phase
+    recorded by a FrameTimer, and the average work counters per frame.\n
+    @attr timer [FrameTimer] - The timer to display\n
+    @attr work [WorkCounters] - The counters to display, or None\n
+    @attr rect [pygame.Rect] - The area covered by the overlay\n
+    @attr budget [float] - The frame budget in seconds, drawn as a line on the graph
+    """
+    def __init__(self, timer, x, y, width=240, budget=1/60, work=None):
+        self.timer = timer
+        self.work = work
+        self.budget = budget
+        self.font = load_font("courier", 12)
+
+        self.lineHeight = self.font.get_linesize()
+        self.graphHeight = 60
+        lines = len(timer.phases) + 1
+        if work is not None:
+            lines += len(COUNTERS)
+        height = self.graphHeight + self.lineHeight * lines + 6
+        self.rect = pygame.Rect(x, y, width, height)
+
+        # The graph scrolls left by one pixel per frame
+        self.graph = pygame.Surface((width, self.graphHeight))
+        self.graph.fill(colour.BLACK)
+        self.labels = None
+        self.frames = 0
+        self.lastCount = timer.count
+
+    def draw(self, screen):
+        "Draw the overlay and return the rect that changed."
+        if self.timer.count != self.lastCount:
+            self.lastCount = self.timer.count
+            self.__add_column(sum(self.timer.last_row()))
+
+        # Refresh the numbers a few times per second, they are unreadable otherwise
+        if self.labels is None or self.frames % 15 == 0:
+            self.labels = self.__render_labels()
+        self.frames += 1
+
+        screen.fill(colour.BLACK, self.rect)
+        screen.blit(self.graph, self.rect.topleft)
+        y = self.rect.y + self.graphHeight + 3
+        for label in self.labels:
+            screen.blit(label, (self.rect.x + 4, y))
+            y += self.lineHeight
+        return self.rect
+
+    def __add_column(self, seconds):
+        (width, height) = self.graph.get_size()
+        self.graph.scroll(-1, 0)
+        self.graph.fill(colour.BLACK, (width - 1, 0, 1, height))
+
+        # Scale the graph so the frame budget sits in the middle
+        bar = min(height, int(seconds / (self.budget * 2) * height))
+        barColour = colour.GREEN if seconds <= self.budget else colour.RED
+        if bar > 0:
+            self.graph.fill(barColour, (width - 1, height - bar, 1, bar))
+        self.graph.set_at((width - 1, height // 2), colour.YELLOW)
+
+    def __render_labels(self):
+        averages = self.timer.averages()
+        total = sum(averages.values())
+        labels = []
+        for phase in self.timer.phases:
+            text = "%-10s %6.2f ms" % (phase, averages[phase] * 1000)
+            labels.append(self.font.render(text, False, colour.WHITE))
+        labels.append(self.font.render("%-10s %6.2f ms" % ("frame", total * 1000), False, colour.LORANGE))
+        if self.work is not None:
+            for (name, value) in self.work.averages().items():
+                labels.append(self.font.render("%-14s %8.0f" % (name, value), False, colour.WHITE))
+        return labels
@@ -8,22 +8,215 @@
 #   The utils file contains functions to help load resources from
 #   the file system (image files, sound files, etc.)
 #====================================================================
+import importlib
 import os.path
+import queue
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
 import pygame
 
+from const import ASSET_CACHE_BYTES, TEXT_CACHE_BYTES, ASSET_PACK
+from counters import work
+
 main_dir = os.path.split(os.path.abspath(__file__))[0]
 
 
+class AssetCache():
+    """
+    Least recently used cache of decoded assets (surfaces and sounds).\n
+    @attr budget [int] - The maximum number of bytes kept in the cache\n
+    @attr bytes [int] - The number of bytes currently cached\n
+    @attr hits [int] - Number of loads served from the cache\n
+    @attr misses [int] - Number of loads that were decoded from disk\n
+    @attr evictions [int] - Number of assets dropped to stay within the budget\n
+    @attr loadTime [float] - Seconds spent decoding the assets that missed
+    """
+    def __init__(self, budget=ASSET_CACHE_BYTES):
+        self.budget = budget
+        self.loadTime = 0.0
+        self.entries = OrderedDict()    # key -> (asset, size in bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        "Returns the cached asset or None."
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key, asset, size):
+        "Cache an asset, evicting the least recently used ones over the budget."
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (asset, size)
+        self.bytes += size
+
+        # Always keep the newest asset, even if it is over the budget by itself
+        while self.bytes > self.budget and len(self.entries) > 1:
+            (_, (_, evicted)) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        "Returns the cache counters as a dict."
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "budget": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "loadTime": self.loadTime,
+        }
+
+
+# Process-wide cache used by load_image() and load_sound()
+assets = AssetCache()
+
+class FontRegistry():
+    """
+    The fonts loaded by load_font(), keyed by (face, size).\n
+    @attr loadTime [float] - Seconds spent looking up and loading fonts
+    """
+    def __init__(self):
+        self.fonts = {}
+        self.loadTime = 0.0
+
+    def get(self, face, size):
+        key = (face.lower(), size)
+        font = self.fonts.get(key)
+        if font is None:
+            start = time.perf_counter()
+            font = open_font(face, size)
+            self.fonts[key] = font
+            self.loadTime += time.perf_counter() - start
+        return font
+
+
+def open_font(face, size):
+    "Look up and open a system font (not cached, see load_font())."
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(face, size)
+
+
+def find_font(face):
+    """
+    Look up the file of a system font, without opening it.\n
+    Returns the path, or None when the default font stands in for it.
+    """
+    return pygame.font.match_font(face)
+
+
+# Shared fonts, and rendered text surfaces used by render_text()
+fonts = FontRegistry()
+texts = AssetCache(TEXT_CACHE_BYTES)
+
+
+# The pack of pre-decoded sprites, opened by open_pack()
+asset_pack = None
+asset_pack_checked = False
+
+
+def open_pack():
+    """
+    Returns the pack of pre-decoded sprites (see assetpack.py), or None if
+    it has not been built. The loose files are used without a pack.
+    """
+    global asset_pack, asset_pack_checked
+    if not asset_pack_checked:
+        path = os.path.join(main_dir, ASSET_PACK)
+        if os.path.exists(path):
+            from assetpack import AssetPack
+            try:
+                asset_pack = AssetPack(path)
+            except (OSError, ValueError) as e:
+                print('Warning, unable to open the asset pack, %s' % e)
+        asset_pack_checked = True
+    return asset_pack
+
+
+def load_packed_image(file, path):
+    "Load an image from the asset pack, or None if it is missing or out of date."
+    pack = open_pack()
+    if pack is None or file not in pack:
+        return None
+    if os.path.exists(path) and os.path.getmtime(path) > pack.mtime:
+        # The loose file was edited after the pack was built
+        return None
+    return pack.load(file)
+
+
+def image_key(file, directory="sprites"):
+    "Returns the asset cache key of an image loaded now."
+    # Surfaces loaded before the display exists keep the file's pixel format
+    return ("image", directory, file, pygame.display.get_surface() is not None)
+
+
 def load_image(file, directory="sprites"):
     """Load an image"""
+    key = image_key(file, directory)
+    surface = assets.get(key)
+    if surface is not None:
+        return surface
+
+    work.imageLoads += 1
+    start = time.perf_counter()
+    surface = decode_image(file, directory, key[3])
+    assets.loadTime += time.perf_counter() - start
+    assets.put(key, surface, surface.get_pitch() * surface.get_height())
+    return surface
+
+
+def decode_image(file, directory, converted):
+    "Read an image from the pack or the disk (not cached, see load_image())."
+    (surface, packed) = read_image(file, directory)
+    if converted:
+        surface = convert_image(surface, packed)
+    return surface
 
-    file = os.path.join(main_dir, directory, file)
+
+def read_image(file, directory):
+    """
+    Read an image from the pack or the disk, in the format it is stored in.\n
+    Returns the surface, and True if it came from the pack.
+    """
+    path = os.path.join(main_dir, directory, file)
+
+    surface = None
+    if directory == "sprites":
+        surface = load_packed_image(file, path)
+    if surface is not None:
+        return (surface, True)
 
     try:
-        surface = pygame.image.load(file)
+        surface = pygame.image.load(path)
     except pygame.error:
-        raise SystemExit('Could not load image "%s" %s'%(file, pygame.get_error()))
+        raise SystemExit('Could not load image "%s" %s'%(path, pygame.get_error()))
+    return (surface, False)
 
+
+def convert_image(surface, packed):
+    "Convert an image from read_image() to the display format, on the main thread."
+    # Packed pixels are already in the display format, only convert
+    # (and copy) them if this display uses another one
+    if packed and surface.get_masks()[:3] == pygame.display.get_surface().get_masks()[:3]:
+        return surface
     return surface.convert()
 
 
@@ -37,9 +230,230 @@ def load_images(*files):
 
 def load_sound(file, directory="assets"):
     """Load audio file"""
-    file = os.path.join(main_dir, directory, file)
-    try:
-        sound = pygame.mixer.Sound(file)
+    key = ("sound", directory, file)
+    sound = assets.get(key)
+    if sound is not None:
         return sound
+
+    start = time.perf_counter()
+    try:
+        sound = decode_sound(file, directory)
     except pygame.error:
-        print ('Warning, unable to load, %s' % file)
+        print ('Warning, unable to load, %s' % os.path.join(main_dir, directory, file))
+        return None
+    assets.loadTime += time.perf_counter() - start
+    assets.put(key, sound, sound_size(sound))
+    return sound
+
+
+def decode_sound(file, directory):
+    "Read an audio file (not cached, see load_sound())."
+    # The mixer is only started once the first sound is needed
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    return read_sound(file, directory)
+
+
+def read_sound(file, directory):
+    "Read an audio file, once the mixer is started."
+    return pygame.mixer.Sound(os.path.join(main_dir, directory, file))
+
+
+def sound_size(sound):
+    "Returns the bytes of decoded samples held by a sound."
+    (frequency, size, channels) = pygame.mixer.get_init()
+    return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+
+class AssetLoader():
+    """
+    Decodes images, sounds and fonts on a worker thread, so the assets of
+    the next scene are ready before it is initialized.\n
+    The worker only reads files and looks up font paths. Everything that
+    touches the display, FreeType or starts a subsystem runs on the main
+    thread: request() opens the asset pack and starts the mixer and the font
+    module before queuing work, and poll() converts the images to the
+    display format, opens the fonts, moves the assets into the caches and
+    imports the requested modules, one per call.\n
+    @attr pending [set] - The keys queued and not decoded yet\n
+    @attr failed [set] - The keys that could not be decoded, they are left
+                         to the main thread to report\n
+    @attr loadTime [float] - Seconds the worker spent decoding
+    """
+    def __init__(self):
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.imports = deque()
+        self.pending = set()
+        self.failed = set()
+        self.loadTime = 0.0
+        self.thread = None
+
+    def request(self, images=(), sounds=(), fonts=(), modules=()):
+        """
+        Queue the assets (and modules to import) that are not loaded yet.\n
+        Returns True if all of them are loaded.
+        """
+        self.poll()
+        jobs = [("module", name) for name in modules]
+        for file in images:
+            jobs.append(image_key(file))
+        for file in sounds:
+            jobs.append(("sound", "assets", file))
+        for (face, size) in fonts:
+            jobs.append(("font", face.lower(), size))
+
+        ready = True
+        for key in jobs:
+            if self.is_loaded(key) or key in self.failed:
+                continue
+            ready = False
+            if key not in self.pending:
+                self.pending.add(key)
+                if key[0] == "module":
+                    # Importing runs the code of the module, poll() does it
+                    self.imports.append(key)
+                else:
+                    self.__prepare(key)
+                    self.jobs.put(key)
+
+        if not self.jobs.empty() and self.thread is None:
+            self.thread = threading.Thread(target=self.__work, name="AssetLoader", daemon=True)
+            self.thread.start()
+        return ready
+
+    def is_loaded(self, key):
+        if key[0] == "font":
+            return key[1:] in fonts.fonts
+        if key[0] == "module":
+            return key[1] in sys.modules
+        return key in assets
+
+    def poll(self):
+        "Move the decoded assets into the caches, and import the next requested module."
+        while True:
+            try:
+                (key, asset, size) = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if size is None:
+                self.failed.add(key)
+            elif key[0] == "font":
+                # The worker found the path, fonts are opened here as FreeType is not thread safe
+                if key[1:] not in fonts.fonts:
+                    try:
+                        fonts.fonts[key[1:]] = pygame.font.Font(asset, key[2])
+                    except (OSError, pygame.error):
+                        self.failed.add(key)
+            elif key[0] == "image":
+                (surface, packed) = asset
+                if key[3]:
+                    surface = convert_image(surface, packed)
+                assets.put(key, surface, surface.get_pitch() * surface.get_height())
+            else:
+                assets.put(key, asset, size)
+
+        if self.imports:
+            key = self.imports.popleft()
+            start = time.perf_counter()
+            try:
+                importlib.import_module(key[1])
+            except (Exception, SystemExit):
+                self.failed.add(key)
+            self.loadTime += time.perf_counter() - start
+            self.pending.discard(key)
+
+    def stop(self):
+        "Drop the queued work and wait for the worker to end, before pygame is quit."
+        if self.thread is None:
+            return
+        while True:
+            try:
+                self.jobs.get_nowait()
+            except queue.Empty:
+                break
+        self.jobs.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def __prepare(self, key):
+        "Set up on the main thread what the worker needs to decode the key."
+        if key[0] == "image":
+            open_pack()
+        elif key[0] == "sound":
+            if not pygame.mixer.get_init():
+                try:
+                    pygame.mixer.init()
+                except pygame.error:
+                    # The sound fails on the worker, load_sound() reports it
+                    pass
+        elif not pygame.font.get_init():
+            pygame.font.init()
+
+    def __work(self):
+        while True:
+            key = self.jobs.get()
+            if key is None:
+                break
+            start = time.perf_counter()
+            (asset, size) = (None, 0)
+            try:
+                if key[0] == "image":
+                    # Converted by poll(), the display belongs to the main thread
+                    asset = read_image(key[2], key[1])
+                elif key[0] == "sound":
+                    asset = read_sound(key[2], key[1])
+                    size = sound_size(asset)
+                else:
+                    asset = find_font(key[1])
+            except (Exception, SystemExit):
+                # A failed job has no size, a font path can be None
+                (asset, size) = (None, None)
+            self.loadTime += time.perf_counter() - start
+            self.results.put((key, asset, size))
+
+
+def load_font(face, size):
+    """
+    Load a system font once and share it between every user.\n
+    @param face [str] - The name of the font\n
+    @param size [int] - The size of the font
+    """
+    return fonts.get(face, size)
+
+
+def render_text(font, text, colour, antialias=False):
+    "Cached wrapper around font.render() -> Surface"
+    key = (font, text, tuple(colour), antialias)
+    surface = texts.get(key)
+    if surface is None:
+        work.fontRenders += 1
+        surface = font.render(text, antialias, colour)
+        texts.put(key, surface, surface.get_pitch() * surface.get_height())
+    return surface
+
+
+class GlyphAtlas():
+    """
+    Pre-rendered glyphs of a font so text made of a small set of
+    characters (ex. signed numbers) can be drawn without rasterizing.\n
+    @attr glyphs [dict] - The surface of every character\n
+    @attr advance [int] - The width of the widest glyph\n
+    @attr height [int] - The height of the glyphs
+    """
+    def __init__(self, font, colour, chars="-0123456789"):
+        self.glyphs = {}
+        for char in chars:
+            self.glyphs[char] = render_text(font, char, colour)
+        self.advance = max(glyph.get_width() for glyph in self.glyphs.values())
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def draw(self, surface, text, pos):
+        "Blit the glyphs of the text onto the surface at pos (x, y)."
+        (x, y) = pos
+        work.blits += len(text)
+        for char in text:
+            glyph = self.glyphs[char]
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()